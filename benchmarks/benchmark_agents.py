@@ -1,18 +1,31 @@
 # benchmarks/benchmark_agents.py
 import asyncio
-import time
-import json
+import logging
+from dataclasses import asdict
+from time import perf_counter_ns
 from pathlib import Path
 
+import numpy as np
+import orjson
+
+try:
+    import uvloop
+except ImportError:  # uvloop has no Windows build
+    uvloop = None
+
 import sys
 import os
 sys.path.append(os.path.join(os.path.dirname(__file__), '..'))
+# The detecter lazily imports `core.models`, which resolves against src/
+sys.path.append(os.path.join(os.path.dirname(__file__), '..', 'src'))
 
 from src.extractor.extractor import ExtractorA
 from src.checker.checker import CheckerA, Report as CheckerReport
 from src.analyser.analyser import AnalyserA, Report as AnalyserReport
 from src.detecter.detecter import DetecterA, GeoCoder
 
+logger = logging.getLogger(__name__)
+
 # Sample data
 SAMPLE_TEXTS = [
     "Heavy flooding reported in Chennai last night. Water levels rising rapidly.",
@@ -27,8 +40,17 @@ SAMPLE_TEXTS = [
     "Crowd panic in Visakhapatnam as sirens go off. No official statement yet."
 ]
 
-# Mock ORM-like classes (since we're not using real DB)
+# Max in-flight LLM extraction calls
+EXTRACTION_CONCURRENCY = 8
+
+# Point type codes used by the detecter benchmark's SoA layout
+POINT_TYPES = ("human", "disaster")
+
+# Mock ORM-like classes (since we're not using real DB).
+# __slots__ drops the per-instance __dict__, which dominates memory at large hotspot counts.
 class MockHumanHotspot:
+    __slots__ = ("location", "timestamp", "emotions", "panic_level", "confidence", "status", "report_id")
+
     def __init__(self, location, timestamp, emotions, panic_level, confidence):
         self.location = location
         self.timestamp = timestamp
@@ -39,6 +61,8 @@ class MockHumanHotspot:
         self.report_id = 1  # dummy
 
 class MockDisasterHotspot:
+    __slots__ = ("location", "timestamp", "event_type", "severity", "risk_level", "confidence", "status", "report_id")
+
     def __init__(self, location, timestamp, event_type, severity, risk_level, confidence):
         self.location = location
         self.timestamp = timestamp
@@ -49,66 +73,54 @@ class MockDisasterHotspot:
         self.status = "pending"
         self.report_id = 1  # dummy
 
-async def benchmark_extractor():
-    extractor = ExtractorA()
+async def benchmark_extractor(extractor):
     print("=== Benchmarking ExtractorA ===")
     
-    start_time = time.time()
+    start_time = perf_counter_ns()
     results = []
+
+    # Submit all prompts at once; the concurrency cap keeps us under provider rate limits
+    raw_results = await extractor.extract_reports_batch(
+        SAMPLE_TEXTS, is_user_input=False, max_concurrency=EXTRACTION_CONCURRENCY
+    )
+
+    for text, result in zip(SAMPLE_TEXTS, raw_results):
+        if result and result.reports:
+            results.extend(result.reports)
+            logger.info("✅ Extracted %d reports from: %s...", len(result.reports), text[:50])
+        else:
+            logger.warning("⚠️ No reports extracted from: %s...", text[:50])
     
-    for text in SAMPLE_TEXTS:
-        try:
-            result = await extractor.extract_reports(text, is_user_input=False)
-            if result and result.reports:
-                results.extend(result.reports)
-                print(f"✅ Extracted {len(result.reports)} reports from: {text[:50]}...")
-            else:
-                print(f"⚠️ No reports extracted from: {text[:50]}...")
-        except Exception as e:
-            print(f"❌ Extraction failed for '{text[:50]}...': {e}")
-    
-    end_time = time.time()
-    print(f"\nProcessed {len(SAMPLE_TEXTS)} texts in {end_time - start_time:.2f}s")
+    elapsed = (perf_counter_ns() - start_time) / 1e9
+    print(f"\nProcessed {len(SAMPLE_TEXTS)} texts in {elapsed:.2f}s")
     print(f"Total reports extracted: {len(results)}")
     return results
 
-def benchmark_checker(reports):
+async def benchmark_checker(reports):
     print("\n=== Benchmarking CheckerA ===")
     
-    start_time = time.time()
-    checker_reports = [
-        CheckerReport(
-            event_type=r.event_type,
-            location=r.location,
-            timestamp=r.timestamp,
-            description=r.description,
-            source=r.source,
-            media_urls=r.media_urls or [],
-            reporter=r.reporter,
-            confidence=r.confidence,
-            veracity_flag=r.veracity_flag,
-        )
-        for r in reports
-    ]
+    start_time = perf_counter_ns()
+    # Extractor and checker Reports share the same fields — validate straight from the field dict
+    checker_reports = [CheckerReport.model_validate(r.__dict__) for r in reports]
     
     checker = CheckerA()
-    verified = checker.run(checker_reports)
+    verified = await asyncio.to_thread(checker.run, checker_reports)
     
-    end_time = time.time()
-    print(f"Processed {len(reports)} reports in {end_time - start_time:.2f}s")
+    elapsed = (perf_counter_ns() - start_time) / 1e9
+    print(f"Processed {len(reports)} reports in {elapsed:.2f}s")
     print(f"Verified reports: {len(verified)}")
     return verified
 
-async def benchmark_analyser(reports):
+async def benchmark_analyser(reports, analyser):
     print("\n=== Benchmarking AnalyserA ===")
     
-    analyser = AnalyserA()
-    start_time = time.time()
+    start_time = perf_counter_ns()
     human_hotspots = []
     disaster_hotspots = []
     
-    for report in reports:
-        pydantic_report = AnalyserReport(
+    # Build the whole batch up front and analyse it in a single call
+    pydantic_reports = [
+        AnalyserReport(
             event_type=report.event_type,
             location=report.location,
             timestamp=report.timestamp,
@@ -116,39 +128,47 @@ async def benchmark_analyser(reports):
             source=report.source,
             confidence=report.confidence,
         )
-        analysis = await analyser.analyze_reports_async([pydantic_report])
-        # Convert to mock ORM objects
-        for h in analysis.human_hotspots:
-            human_hotspots.append(MockHumanHotspot(
-                location=h.location,
-                timestamp=h.timestamp,
-                emotions=[e.dict() for e in h.emotions],
-                panic_level=h.panic_level,
-                confidence=h.confidence,
-            ))
-        for d in analysis.disaster_hotspots:
-            disaster_hotspots.append(MockDisasterHotspot(
-                location=d.location,
-                timestamp=d.timestamp,
-                event_type=d.event_type,
-                severity=d.severity,
-                risk_level=d.risk_level,
-                confidence=d.confidence,
-            ))
-    
-    end_time = time.time()
-    print(f"Processed {len(reports)} reports in {end_time - start_time:.2f}s")
+        for report in reports
+    ]
+    analysis = await analyser.analyze_reports_async(pydantic_reports)
+
+    # Convert to mock ORM objects
+    for h in analysis.human_hotspots:
+        human_hotspots.append(MockHumanHotspot(
+            location=h.location,
+            timestamp=h.timestamp,
+            emotions=[asdict(e) for e in h.emotions],
+            panic_level=h.panic_level,
+            confidence=h.confidence,
+        ))
+    for d in analysis.disaster_hotspots:
+        disaster_hotspots.append(MockDisasterHotspot(
+            location=d.location,
+            timestamp=d.timestamp,
+            event_type=d.event_type,
+            severity=d.severity,
+            risk_level=d.risk_level,
+            confidence=d.confidence,
+        ))
+    
+    elapsed = (perf_counter_ns() - start_time) / 1e9
+    print(f"Processed {len(reports)} reports in {elapsed:.2f}s")
     print(f"Human hotspots: {len(human_hotspots)}")
     print(f"Disaster hotspots: {len(disaster_hotspots)}")
     return human_hotspots, disaster_hotspots
 
-def benchmark_detecter(human_hotspots, disaster_hotspots):
+async def benchmark_detecter(human_hotspots, disaster_hotspots):
     print("\n=== Benchmarking DetecterA ===")
     
     # Mock DB — just a list
+    class MockResult:
+        def scalars(self): return self
+        def all(self): return []  # no existing composite hotspots
+
     class MockDB:
         def __init__(self):
             self.composite_hotspots = []
+        async def execute(self, *args, **kwargs): return MockResult()
         async def commit(self): pass
         async def refresh(self, obj): pass
     
@@ -159,52 +179,54 @@ def benchmark_detecter(human_hotspots, disaster_hotspots):
     detecter = DetecterA(MockDB())
     detecter.geocoder = mock_geocoder  # Override with mock
     
-    start_time = time.time()
-    
-    # Assemble points directly from mock ORM objects
-    points = []
-    for h in human_hotspots:
-        coords = detecter.geocoder.geocode(h.location)
-        if coords:
-            points.append({
-                "type": "human",
-                "payload": h,
-                "latitude": coords[0],
-                "longitude": coords[1],
-                "confidence": h.confidence or 1.0,
-            })
-    for d in disaster_hotspots:
-        coords = detecter.geocoder.geocode(d.location)
-        if coords:
-            points.append({
-                "type": "disaster",
-                "payload": d,
-                "latitude": coords[0],
-                "longitude": coords[1],
-                "confidence": d.confidence or 1.0,
-            })
+    start_time = perf_counter_ns()
+    
+    # Assemble points as parallel arrays (SoA) — one batched geocode pass
+    combined = list(human_hotspots) + list(disaster_hotspots)
+    n = len(combined)
+    coords = detecter.geocoder.geocode_batch([x.location for x in combined])
+    confidences = np.fromiter((x.confidence or 1.0 for x in combined), dtype=np.float64, count=n)
+    types = np.zeros(n, dtype='u1')
+    types[len(human_hotspots):] = 1  # 0 = human, 1 = disaster
+
+    valid = ~np.isnan(coords).any(axis=1)
+    coords, confidences, types = coords[valid], confidences[valid], types[valid]
+    payloads = [x for x, ok in zip(combined, valid) if ok]
+
+    # update_or_create_composite_hotspot still consumes per-point dicts
+    points = [
+        {
+            "type": POINT_TYPES[t],
+            "payload": payload,
+            "latitude": lat,
+            "longitude": lon,
+            "confidence": conf,
+        }
+        for payload, t, (lat, lon), conf in zip(payloads, types.tolist(), coords.tolist(), confidences.tolist())
+    ]
     
     if not points:
         print("❌ No geocoded points found")
         return []
     
     # Cluster and process
-    clusters = detecter.cluster_points(points)
-    output_list = []
-    for cluster_points in clusters.values():
-        try:
-            hotspot_data = asyncio.run(detecter.update_or_create_composite_hotspot(cluster_points))
-            output_list.append(hotspot_data)
-        except Exception as e:
-            print(f"❌ Failed to process cluster: {e}")
-            continue
+    labels = detecter.cluster_labels(coords)
+    clusters = detecter.group_by_label(points, labels)
+    # Per-cluster centroids in one bincount pass rather than per-cluster Python sums
+    centroids = detecter.cluster_centroids(coords, confidences, labels)
+    # One session can't run concurrent statements, so all clusters persist in one batched call
+    hotspot_results = await detecter.persist_clusters(
+        list(clusters.values()), [tuple(centroids[label].tolist()) for label in clusters]
+    )
+    await detecter.db.commit()
+    output_list = [hotspot_data for hotspot_data in hotspot_results if hotspot_data is not None]
     
     # Mark as aggregated (mock)
     for p in points:
         p["payload"].status = "aggregated"
     
-    end_time = time.time()
-    print(f"Processed {len(points)} points in {end_time - start_time:.2f}s")
+    elapsed = (perf_counter_ns() - start_time) / 1e9
+    print(f"Processed {len(points)} points in {elapsed:.2f}s")
     print(f"Composite hotspots: {len(output_list)}")
     return output_list
 
@@ -212,31 +234,44 @@ async def main():
     print("🚀 Starting Agent Benchmark with Real LLM APIs...\n")
     
     # 1. Extract
-    extracted_reports = await benchmark_extractor()
+    # One extractor (and its pooled HTTP session) for the whole run
+    extractor = ExtractorA()
+    extracted_reports = await benchmark_extractor(extractor)
     if not extracted_reports:
         print("❌ No reports extracted. Check API keys and network.")
         return
     
-    # 2. Check
-    verified_reports = benchmark_checker(extracted_reports)
+    # 2. Check — runs in a worker thread while the analyser model loads alongside it.
+    # Reports are checked as one set: splitting them into batches would split clusters.
+    analyser = AnalyserA()
+    analyser_warmup = asyncio.create_task(asyncio.to_thread(getattr, analyser, "emotion_classifier"))
+    verified_reports = await benchmark_checker(extracted_reports)
     if not verified_reports:
+        analyser_warmup.cancel()
         print("❌ No reports verified. Adjust CheckerA thresholds if needed.")
         return
     
     # 3. Analyse
-    human_hotspots, disaster_hotspots = await benchmark_analyser(verified_reports)
+    try:
+        await analyser_warmup
+    except RuntimeError as e:
+        print(f"⚠️ Analyser model warm-up failed: {e}")
+    human_hotspots, disaster_hotspots = await benchmark_analyser(verified_reports, analyser)
     if not human_hotspots and not disaster_hotspots:
         print("❌ No hotspots generated. Check AnalyserA model loading.")
         return
     
     # 4. Detect
-    composite_hotspots = benchmark_detecter(human_hotspots, disaster_hotspots)
+    composite_hotspots = await benchmark_detecter(human_hotspots, disaster_hotspots)
     
     print("\n🎉 Benchmark Complete!")
     print(f"Final Output: {len(composite_hotspots)} composite hotspots")
     if composite_hotspots:
         print("\nSample Composite Hotspot:")
-        print(json.dumps(composite_hotspots[0], indent=2))
+        print(orjson.dumps(composite_hotspots[0], option=orjson.OPT_INDENT_2).decode())
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    if uvloop is not None:
+        uvloop.run(main())
+    else:
+        asyncio.run(main())
\ No newline at end of file
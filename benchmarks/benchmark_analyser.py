@@ -1,5 +1,5 @@
 # benchmarks/benchmark_analyser.py
-import time
+from time import perf_counter_ns
 from src.analyser.analyser import AnalyserA, Report
 
 def benchmark():
@@ -9,12 +9,12 @@ def benchmark():
         for i in range(100)
     ]
 
-    start = time.time()
+    start = perf_counter_ns()
     output = analyser.analyze_reports(reports)
-    end = time.time()
+    elapsed = (perf_counter_ns() - start) / 1e9
 
-    print(f"Processed {len(reports)} reports in {end - start:.2f}s")
-    print(f"Latency per report: {(end - start)/len(reports)*1000:.2f}ms")
+    print(f"Processed {len(reports)} reports in {elapsed:.2f}s")
+    print(f"Latency per report: {elapsed/len(reports)*1000:.2f}ms")
     print(f"Total human hotspots: {len(output.human_hotspots)}")
 
 if __name__ == "__main__":
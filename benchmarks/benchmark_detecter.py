@@ -1,17 +1,33 @@
 # benchmarks/benchmark_detecter.py
 import asyncio
-import time
-from unittest.mock import MagicMock
+from time import perf_counter_ns
+from unittest.mock import AsyncMock, patch
 from src.detecter.detecter import DetecterA
 
-async def benchmark():
-    # Mock DB session
-    mock_session = MagicMock()
-    mock_session.execute = MagicMock(return_value=MagicMock(scalars=lambda: MagicMock(all=lambda: [])))
-    mock_session.commit = MagicMock()
-    mock_session.refresh = MagicMock()
+# Minimal stand-ins for the AsyncSession calls DetecterA makes — no MagicMock
+# call recording inside the timed region
+class _EmptyResult:
+    def scalars(self):
+        return self
+
+    def all(self):
+        return []
+
+class StubSession:
+    async def execute(self, *args, **kwargs):
+        return _EmptyResult()
+
+    def add(self, obj):
+        pass
 
-    detecter = DetecterA(mock_session)
+    async def commit(self):
+        pass
+
+    async def refresh(self, obj):
+        pass
+
+async def benchmark():
+    detecter = DetecterA(StubSession())
 
     # Mock hotspots
     class MockHotspot:
@@ -29,10 +45,10 @@ async def benchmark():
     humans = [MockHotspot(40.7128 + i*0.01, -74.0060 + i*0.01) for i in range(50)]
     disasters = [MockHotspot(40.7128 + i*0.01, -74.0060 + i*0.01) for i in range(50)]
 
-    with patch('src.detecter.detecter.GeoCoder.geocode', return_value=(40.7128, -74.0060)):
-        start = time.time()
+    with patch('src.detecter.detecter.GeoCoder.geocode_async', new=AsyncMock(return_value=(40.7128, -74.0060))):
+        start = perf_counter_ns()
         result = await detecter.generate_map_json_with_persistence()
-        end = time.time()
+        elapsed = (perf_counter_ns() - start) / 1e9
 
-    print(f"Processed 100 hotspots in {end - start:.2f}s")
+    print(f"Processed 100 hotspots in {elapsed:.2f}s")
     print(f"Generated {len(result)} composite hotspots")
\ No newline at end of file
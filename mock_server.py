@@ -7,8 +7,11 @@ Runs without requiring API keys or external dependencies
 import asyncio
 import json
 import logging
+import orjson
+import re
 import time
-from typing import List, Optional, Dict, Any
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Tuple
 from fastapi import FastAPI, HTTPException
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel
@@ -18,12 +21,26 @@ import uvicorn
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Mock data storage
-mock_raw_posts = []
-mock_reports = []
-mock_human_hotspots = []
-mock_disaster_hotspots = []
-mock_composite_hotspots = []
+# Mock data storage — columnar (one list per field) so counts and per-field
+# aggregations never walk a list of row dicts
+def _new_table(*columns: str) -> Dict[str, List[Any]]:
+    return {column: [] for column in columns}
+
+def _append_row(table: Dict[str, List[Any]], row: Dict[str, Any]) -> None:
+    for column, values in table.items():
+        values.append(row[column])
+
+def _row_count(table: Dict[str, List[Any]]) -> int:
+    return len(next(iter(table.values())))
+
+mock_raw_posts = _new_table("id", "content", "timestamp", "status")
+mock_reports = _new_table("event_type", "location", "timestamp", "description", "source", "confidence", "veracity_flag")
+mock_human_hotspots = _new_table("location", "timestamp", "emotions", "panic_level", "affected_population_estimate")
+mock_disaster_hotspots = _new_table("location", "timestamp", "event_type", "severity", "risk_level", "description_summary")
+mock_composite_hotspots = _new_table(
+    "latitude", "longitude", "aggregated_emotions", "average_panic_level",
+    "event_types", "severity_level", "risk_level", "contributing_reports"
+)
 
 # === 1. Pydantic Models ===
 
@@ -35,6 +52,59 @@ class MapResponse(BaseModel):
 
 # === 2. Mock Extractor ===
 
+# (keyword, location keyword, report template) — scanned once per distinct text
+_KEYWORD_REPORTS = (
+    ("flood", "chennai", {
+        "event_type": "flood",
+        "location": "Chennai",
+        "timestamp": "2024-01-15T10:30:00Z",
+        "source": "mock_social_media",
+        "confidence": 0.8,
+        "veracity_flag": "unconfirmed"
+    }),
+    ("tsunami", "andaman", {
+        "event_type": "tsunami",
+        "location": "Andaman Coast",
+        "timestamp": "2024-01-15T11:00:00Z",
+        "source": "mock_news_agency",
+        "confidence": 0.9,
+        "veracity_flag": "confirmed"
+    }),
+)
+
+_DEFAULT_REPORT = {
+    "event_type": "disaster",
+    "location": "Unknown",
+    "timestamp": "2024-01-15T12:00:00Z",
+    "source": "mock_user_input",
+    "confidence": 0.7,
+    "veracity_flag": "unknown"
+}
+
+# Every keyword above, matched in a single case-insensitive pass
+_KEYWORD_PATTERN = re.compile(
+    "|".join(re.escape(kw) for keyword, location_keyword, _ in _KEYWORD_REPORTS for kw in (keyword, location_keyword)),
+    re.IGNORECASE,
+)
+
+@lru_cache(maxsize=4096)
+def _build_reports(text: str) -> Tuple[Dict[str, Any], ...]:
+    """Generate mock reports for a text; cached so repeated payloads skip the scan."""
+    hits = {match.lower() for match in _KEYWORD_PATTERN.findall(text)}
+    reports = []
+    for keyword, location_keyword, template in _KEYWORD_REPORTS:
+        if keyword in hits:
+            report = {**template, "description": text}
+            if location_keyword not in hits:
+                report["location"] = "Unknown"
+            reports.append(report)
+
+    # Always return at least one report for testing
+    if not reports:
+        reports.append({**_DEFAULT_REPORT, "description": text})
+
+    return tuple(reports)
+
 class MockExtractor:
     def __init__(self):
         self.extraction_count = 0
@@ -43,47 +113,8 @@ class MockExtractor:
         self.extraction_count += 1
         logger.info(f"Mock extractor processing: {text[:50]}...")
 
-        # Generate mock reports based on text content
-        reports = []
-
-        if "flood" in text.lower():
-            report = {
-                "event_type": "flood",
-                "location": "Chennai" if "chennai" in text.lower() else "Unknown",
-                "timestamp": "2024-01-15T10:30:00Z",
-                "description": text,
-                "source": "mock_social_media",
-                "confidence": 0.8,
-                "veracity_flag": "unconfirmed"
-            }
-            reports.append(report)
-
-        if "tsunami" in text.lower():
-            report = {
-                "event_type": "tsunami",
-                "location": "Andaman Coast" if "andaman" in text.lower() else "Unknown",
-                "timestamp": "2024-01-15T11:00:00Z",
-                "description": text,
-                "source": "mock_news_agency",
-                "confidence": 0.9,
-                "veracity_flag": "confirmed"
-            }
-            reports.append(report)
-
-        # Always return at least one report for testing
-        if not reports:
-            report = {
-                "event_type": "disaster",
-                "location": "Unknown",
-                "timestamp": "2024-01-15T12:00:00Z",
-                "description": text,
-                "source": "mock_user_input",
-                "confidence": 0.7,
-                "veracity_flag": "unknown"
-            }
-            reports.append(report)
-
-        return {"reports": reports}
+        # Copy the cached reports — downstream agents mutate them in place
+        return {"reports": [dict(report) for report in _build_reports(text)]}
 
 # === 3. Mock Checker ===
 
@@ -149,6 +180,30 @@ class MockAnalyser:
 
 # === 5. Mock Detecter ===
 
+# Built once at import; every request hands out the same (read-only) hotspot dicts
+_MOCK_COMPOSITE_HOTSPOTS = (
+    {
+        "latitude": 13.0827,
+        "longitude": 80.2707,
+        "aggregated_emotions": {"fear": 0.8, "panic": 0.6},
+        "average_panic_level": 0.7,
+        "event_types": ["flood"],
+        "severity_level": "high",
+        "risk_level": "high",
+        "contributing_reports": 3
+    },
+    {
+        "latitude": 11.6234,
+        "longitude": 92.7265,
+        "aggregated_emotions": {"fear": 0.9, "panic": 0.8},
+        "average_panic_level": 0.85,
+        "event_types": ["tsunami"],
+        "severity_level": "critical",
+        "risk_level": "critical",
+        "contributing_reports": 2
+    },
+)
+
 class MockDetecter:
     def __init__(self):
         self.detection_count = 0
@@ -157,35 +212,19 @@ class MockDetecter:
         self.detection_count += 1
         logger.info("Mock detecter generating composite hotspots")
 
-        # Create mock composite hotspots
-        hotspots = [
-            {
-                "latitude": 13.0827,
-                "longitude": 80.2707,
-                "aggregated_emotions": {"fear": 0.8, "panic": 0.6},
-                "average_panic_level": 0.7,
-                "event_types": ["flood"],
-                "severity_level": "high",
-                "risk_level": "high",
-                "contributing_reports": 3
-            },
-            {
-                "latitude": 11.6234,
-                "longitude": 92.7265,
-                "aggregated_emotions": {"fear": 0.9, "panic": 0.8},
-                "average_panic_level": 0.85,
-                "event_types": ["tsunami"],
-                "severity_level": "critical",
-                "risk_level": "critical",
-                "contributing_reports": 2
-            }
-        ]
-
-        return hotspots
+        # Callers only count or serialize these, so the shared dicts are not copied
+        return list(_MOCK_COMPOSITE_HOTSPOTS)
 
 # === 6. FastAPI App ===
 
-app = FastAPI(title="Mock Disaster Intelligence Server")
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson — encodes straight to bytes"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content)
+
+app = FastAPI(title="Mock Disaster Intelligence Server", default_response_class=ORJSONResponse)
 
 # Initialize mock agents
 mock_extractor = MockExtractor()
@@ -199,14 +238,13 @@ async def ingest_data(post_input: RawPostInput):
     logger.info(f"Ingesting data: {post_input.content}")
 
     # Store raw post
-    post_id = len(mock_raw_posts) + 1
-    raw_post = {
+    post_id = _row_count(mock_raw_posts) + 1
+    _append_row(mock_raw_posts, {
         "id": post_id,
         "content": post_input.content,
         "timestamp": "2024-01-15T12:00:00Z",
         "status": "pending"
-    }
-    mock_raw_posts.append(raw_post)
+    })
 
     # Step 1: Extract
     text = post_input.content.get("text", "")
@@ -265,11 +303,11 @@ async def get_metrics():
         "checker_calls": mock_checker.check_count,
         "analyser_calls": mock_analyser.analysis_count,
         "detecter_calls": mock_detecter.detection_count,
-        "total_raw_posts": len(mock_raw_posts),
-        "total_reports": len(mock_reports),
-        "total_human_hotspots": len(mock_human_hotspots),
-        "total_disaster_hotspots": len(mock_disaster_hotspots),
-        "total_composite_hotspots": len(mock_composite_hotspots)
+        "total_raw_posts": _row_count(mock_raw_posts),
+        "total_reports": _row_count(mock_reports),
+        "total_human_hotspots": _row_count(mock_human_hotspots),
+        "total_disaster_hotspots": _row_count(mock_disaster_hotspots),
+        "total_composite_hotspots": _row_count(mock_composite_hotspots)
     }
 
 # === 7. Main ===
@@ -285,4 +323,5 @@ if __name__ == "__main__":
     print("\n🔧 No API keys required - all agents are mocked!")
     print("=" * 60)
 
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # loop="auto" runs on uvloop whenever it is installed
+    uvicorn.run(app, host="0.0.0.0", port=8000, loop="auto")
@@ -61,14 +61,21 @@ def start_server():
     print("Press Ctrl+C to stop the server")
     print("=" * 50)
 
+    command = [
+        sys.executable, "-m", "uvicorn", "main:app",
+        "--host", "0.0.0.0",
+        "--port", "8000"
+    ]
+    if os.getenv("ENV") == "prod":
+        # Production: uvloop + httptools (when installed) across several workers
+        workers = os.getenv("WEB_CONCURRENCY", str((os.cpu_count() or 1) * 2 + 1))
+        command += ["--loop", "auto", "--http", "auto", "--workers", workers]
+    else:
+        command.append("--reload")
+
     try:
         # Start the server
-        subprocess.run([
-            sys.executable, "-m", "uvicorn", "main:app",
-            "--host", "0.0.0.0",
-            "--port", "8000",
-            "--reload"
-        ])
+        subprocess.run(command)
     except KeyboardInterrupt:
         print("\n🛑 Server stopped by user")
     except Exception as e:
@@ -3,17 +3,20 @@
 Test script for the SIEM Server
 """
 
-import requests
+import asyncio
+import httpx
 import json
 import time
-from typing import Dict, Any
+from typing import Dict, Any, Awaitable, Callable
 
-def test_server_health(base_url: str = "http://localhost:8000"):
+DEFAULT_BASE_URL = "http://localhost:8000"
+
+async def check_server_health(client: httpx.AsyncClient):
     """Test server health endpoint"""
     print("🏥 Testing server health...")
 
     try:
-        response = requests.get(f"{base_url}/health")
+        response = await client.get("/health")
         if response.status_code == 200:
             data = response.json()
             print("✅ Server is healthy")
@@ -26,7 +29,7 @@ def test_server_health(base_url: str = "http://localhost:8000"):
         print(f"❌ Health check failed: {e}")
         return False
 
-def test_extract_endpoint(base_url: str = "http://localhost:8000"):
+async def check_extract_endpoint(client: httpx.AsyncClient):
     """Test the extract endpoint"""
     print("\n🔍 Testing extract endpoint...")
 
@@ -36,7 +39,7 @@ def test_extract_endpoint(base_url: str = "http://localhost:8000"):
     }
 
     try:
-        response = requests.post(f"{base_url}/extract", json=test_data)
+        response = await client.post("/extract", json=test_data)
         if response.status_code == 200:
             data = response.json()
             print("✅ Extract endpoint working")
@@ -54,7 +57,7 @@ def test_extract_endpoint(base_url: str = "http://localhost:8000"):
         print(f"❌ Extract test failed: {e}")
         return False
 
-def test_analyze_endpoint(base_url: str = "http://localhost:8000"):
+async def check_analyze_endpoint(client: httpx.AsyncClient):
     """Test the full analyze endpoint"""
     print("\n🔬 Testing analyze endpoint...")
 
@@ -64,7 +67,7 @@ def test_analyze_endpoint(base_url: str = "http://localhost:8000"):
     }
 
     try:
-        response = requests.post(f"{base_url}/analyze", json=test_data)
+        response = await client.post("/analyze", json=test_data)
         if response.status_code == 200:
             data = response.json()
             print("✅ Analyze endpoint working")
@@ -86,7 +89,7 @@ def test_analyze_endpoint(base_url: str = "http://localhost:8000"):
         print(f"❌ Analyze test failed: {e}")
         return False
 
-def test_different_inputs(base_url: str = "http://localhost:8000"):
+async def check_different_inputs(client: httpx.AsyncClient):
     """Test with different types of input"""
     print("\n📝 Testing different input types...")
 
@@ -105,12 +108,19 @@ def test_different_inputs(base_url: str = "http://localhost:8000"):
         }
     ]
 
+    # The cases are independent, so send them concurrently over the shared client
+    responses = await asyncio.gather(
+        *[client.post("/extract", json=test_case) for test_case in test_cases],
+        return_exceptions=True
+    )
+
     results = []
 
-    for test_case in test_cases:
+    for test_case, response in zip(test_cases, responses):
         print(f"\n   Testing: {test_case['name']}")
         try:
-            response = requests.post(f"{base_url}/extract", json=test_case)
+            if isinstance(response, Exception):
+                raise response
             if response.status_code == 200:
                 data = response.json()
                 results.append({
@@ -136,32 +146,50 @@ def test_different_inputs(base_url: str = "http://localhost:8000"):
 
     return results
 
-def run_full_test_suite(base_url: str = "http://localhost:8000"):
-    """Run the complete test suite"""
+async def _run_with_client(base_url: str, check: Callable[[httpx.AsyncClient], Awaitable[Any]]):
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        return await check(client)
+
+# Synchronous entry points, one client per call
+def test_server_health(base_url: str = DEFAULT_BASE_URL):
+    return asyncio.run(_run_with_client(base_url, check_server_health))
+
+def test_extract_endpoint(base_url: str = DEFAULT_BASE_URL):
+    return asyncio.run(_run_with_client(base_url, check_extract_endpoint))
+
+def test_analyze_endpoint(base_url: str = DEFAULT_BASE_URL):
+    return asyncio.run(_run_with_client(base_url, check_analyze_endpoint))
+
+def test_different_inputs(base_url: str = DEFAULT_BASE_URL):
+    return asyncio.run(_run_with_client(base_url, check_different_inputs))
+
+async def run_full_test_suite_async(base_url: str = DEFAULT_BASE_URL):
+    """Run the complete test suite over one keep-alive connection"""
     print("🧪 SIEM SERVER TEST SUITE")
     print("=" * 50)
 
     tests = [
-        ("Health Check", test_server_health),
-        ("Extract Endpoint", test_extract_endpoint),
-        ("Analyze Endpoint", test_analyze_endpoint),
-        ("Different Inputs", test_different_inputs)
+        ("Health Check", check_server_health),
+        ("Extract Endpoint", check_extract_endpoint),
+        ("Analyze Endpoint", check_analyze_endpoint),
+        ("Different Inputs", check_different_inputs)
     ]
 
     results = []
 
-    for test_name, test_func in tests:
-        print(f"\n📋 Running: {test_name}")
-        try:
-            if test_name == "Different Inputs":
-                result = test_func(base_url)
-                results.append((test_name, True, result))
-            else:
-                result = test_func(base_url)
-                results.append((test_name, result, None))
-        except Exception as e:
-            print(f"❌ Test failed with exception: {e}")
-            results.append((test_name, False, str(e)))
+    async with httpx.AsyncClient(base_url=base_url) as client:
+        for test_name, test_func in tests:
+            print(f"\n📋 Running: {test_name}")
+            try:
+                if test_name == "Different Inputs":
+                    result = await test_func(client)
+                    results.append((test_name, True, result))
+                else:
+                    result = await test_func(client)
+                    results.append((test_name, result, None))
+            except Exception as e:
+                print(f"❌ Test failed with exception: {e}")
+                results.append((test_name, False, str(e)))
 
     # Summary
     print("\n📊 TEST RESULTS SUMMARY")
@@ -192,11 +220,15 @@ def run_full_test_suite(base_url: str = "http://localhost:8000"):
         print("⚠️ Some tests failed. Check the errors above.")
         return False
 
+def run_full_test_suite(base_url: str = DEFAULT_BASE_URL):
+    """Run the complete test suite"""
+    return asyncio.run(run_full_test_suite_async(base_url))
+
 if __name__ == "__main__":
     import sys
 
     # Allow custom base URL
-    base_url = "http://localhost:8000"
+    base_url = DEFAULT_BASE_URL
     if len(sys.argv) > 1:
         base_url = sys.argv[1]
 
@@ -1,14 +1,34 @@
 # src/analyser/analyser.py
 import asyncio
 import logging
-from typing import List, Optional, Dict, Any
+import os
+import platform
+import re
+import shutil
+import tempfile
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import List, Optional, Dict, Any, Tuple
 from pydantic import BaseModel, Field
-from transformers import pipeline
+from transformers import AutoTokenizer, pipeline
 from nltk.tokenize import sent_tokenize
 import nltk
+import numpy as np
 import time
 from prometheus_client import Counter as PrometheusCounter, Histogram
 
+try:
+    import torch
+except ImportError:
+    torch = None
+
+# Optional: int8 ONNX Runtime inference for the emotion model on CPU
+try:
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+except ImportError:
+    ORTModelForSequenceClassification = None
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -42,18 +62,24 @@ class Report(BaseModel):
     source: Optional[str] = None
     confidence: Optional[float] = Field(None, ge=0.0, le=1.0)
 
-class EmotionScore(BaseModel):
+# Inner types are built once per label/chunk/report, so they are plain slotted dataclasses
+# rather than validated models; AnalysisOutput (the envelope) still serializes them.
+
+@dataclass(slots=True, frozen=True)
+class EmotionScore:
     emotion: str
-    score: float = Field(..., ge=0.0, le=1.0)
+    score: float
 
-class HumanHotspot(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class HumanHotspot:
     location: Optional[str] = None
     timestamp: Optional[str] = None
     emotions: List[EmotionScore]
     panic_level: str
     affected_population_estimate: Optional[int] = None
 
-class DisasterHotspot(BaseModel):
+@dataclass(slots=True, kw_only=True)
+class DisasterHotspot:
     location: Optional[str] = None
     timestamp: Optional[str] = None
     event_type: Optional[str] = None
@@ -65,9 +91,90 @@ class AnalysisOutput(BaseModel):
     human_hotspots: List[HumanHotspot]
     disaster_hotspots: List[DisasterHotspot]
 
+# Duplicate descriptions are common (rumours, reposts); cache the pure text steps.
+# Tuples, not lists, so callers can't mutate a cached value.
+
+# Control characters except newlines/tabs map to None, i.e. are deleted by str.translate
+_CTRL_TABLE = {i: None for i in range(32) if chr(i) not in '\n\t'}
+
+@lru_cache(maxsize=4096)
+def _sanitize_cached(text: str, max_length: int) -> str:
+    return text.translate(_CTRL_TABLE)[:max_length]
+
+@lru_cache(maxsize=4096)
+def _sent_tokenize_cached(text: str) -> Tuple[str, ...]:
+    try:
+        # Primary: NLTK sentence tokenizer
+        return tuple(sent_tokenize(text))
+    except Exception as e:
+        logger.warning(f"NLTK tokenization failed: {e}. Falling back to manual splitting.")
+        # Fallback: Split by periods, exclamation, question marks, dropping empty chunks
+        return tuple(chunk.strip() for chunk in re.split(r'[.!?]+', text) if chunk.strip())
+
+class BatchCoalescer:
+    """
+    Merges texts submitted by concurrent callers within a short window into one
+    classify call (run in a worker thread), then hands each caller its slice.
+    """
+
+    def __init__(self, classify, window_ms: float = 10):
+        self.classify = classify
+        self.window = window_ms / 1000
+        self._loop = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def submit(self, texts: List[str]) -> List[Any]:
+        if not texts:
+            return []
+        loop = asyncio.get_running_loop()
+        if self._task is None or self._task.done() or self._loop is not loop:
+            # (Re)start the worker on the current loop, e.g. after a previous asyncio.run() ended
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._task = loop.create_task(self._run())
+        future = loop.create_future()
+        self._queue.put_nowait((texts, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(self.window)
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            try:
+                results = await loop.run_in_executor(None, self.classify, texts)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            offset = 0
+            for item_texts, future in batch:
+                if not future.done():
+                    future.set_result(results[offset:offset + len(item_texts)])
+                offset += len(item_texts)
+
 # === 2. AnalyserA ===
 
 class AnalyserA:
+    __slots__ = (
+        "severity_map",
+        "panic_weights",
+        "max_description_length",
+        "emotion_batch_size",
+        "model_name",
+        "use_onnx",
+        "onnx_cache_dir",
+        "_emotion_classifier",
+        "_coalescer",
+    )
+
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         config = config or {}
         self.severity_map = config.get("severity_map", {
@@ -91,13 +198,77 @@ class AnalyserA:
             "surprise": 0.3,
         })
         self.max_description_length = config.get("max_description_length", 2000)
+        self.emotion_batch_size = config.get("emotion_batch_size", 32)
         self.model_name = config.get("model_name", "j-hartmann/emotion-english-distilroberta-base")
+        # Opt-in: int8 scores can drift slightly from the PyTorch model's
+        self.use_onnx = config.get("use_onnx", False)
+        self.onnx_cache_dir = config.get("onnx_cache_dir", os.path.join(".cache", "onnx"))
         self._emotion_classifier = None
+        self._coalescer = BatchCoalescer(self.classify_emotions, window_ms=config.get("coalesce_window_ms", 10))
+
+    @staticmethod
+    def _quantization_config():
+        """Dynamic int8 config for the CPU we are running on"""
+        if platform.machine().lower() in ("arm64", "aarch64"):
+            return AutoQuantizationConfig.arm64(is_static=False, per_channel=False)
+        try:
+            with open("/proc/cpuinfo") as f:
+                flags = f.read()
+        except OSError:
+            flags = ""
+        if "avx512_vnni" in flags:
+            return AutoQuantizationConfig.avx512_vnni(is_static=False, per_channel=False)
+        if "avx512" in flags:
+            return AutoQuantizationConfig.avx512(is_static=False, per_channel=False)
+        return AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+
+    def _load_onnx_pipeline(self):
+        """Export the model to ONNX once, quantize it to int8, and wrap it in a pipeline"""
+        quantized_dir = os.path.join(self.onnx_cache_dir, self.model_name.replace("/", "__"))
+        if not os.path.isdir(quantized_dir):
+            logger.info(f"Exporting {self.model_name} to int8 ONNX at {quantized_dir}")
+            os.makedirs(self.onnx_cache_dir, exist_ok=True)
+            # Build in a scratch dir and rename it into place, so an interrupted export
+            # never leaves a half-written quantized_dir behind
+            tmp_dir = tempfile.mkdtemp(prefix=".export-", dir=self.onnx_cache_dir)
+            try:
+                model = ORTModelForSequenceClassification.from_pretrained(
+                    self.model_name, export=True, provider="CPUExecutionProvider"
+                )
+                quantizer = ORTQuantizer.from_pretrained(model)
+                quantizer.quantize(save_dir=tmp_dir, quantization_config=self._quantization_config())
+                AutoTokenizer.from_pretrained(self.model_name).save_pretrained(tmp_dir)
+                try:
+                    os.rename(tmp_dir, quantized_dir)
+                except OSError:
+                    if not os.path.isdir(quantized_dir):  # not just a concurrent export that won
+                        raise
+            finally:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+
+        model = ORTModelForSequenceClassification.from_pretrained(
+            quantized_dir, file_name="model_quantized.onnx", provider="CPUExecutionProvider"
+        )
+        return pipeline(
+            "text-classification",
+            model=model,
+            tokenizer=AutoTokenizer.from_pretrained(quantized_dir),
+            top_k=None,
+            truncation=True,
+            max_length=512
+        )
 
     @property
     def emotion_classifier(self):
         if self._emotion_classifier is None:
             logger.info(f"Loading emotion classifier model: {self.model_name}")
+            if self.use_onnx and ORTModelForSequenceClassification is not None:
+                try:
+                    self._emotion_classifier = self._load_onnx_pipeline()
+                    logger.info("Emotion classifier loaded successfully (ONNX Runtime, int8)")
+                    return self._emotion_classifier
+                except Exception as e:
+                    logger.warning(f"ONNX emotion model unavailable, falling back to PyTorch: {e}")
             try:
                 self._emotion_classifier = pipeline(
                     "text-classification",
@@ -115,30 +286,86 @@ class AnalyserA:
     def _sanitize_text(self, text: Optional[str]) -> str:
         if not text:
             return ""
-        # Remove control characters except newlines/tabs
-        sanitized = ''.join(ch for ch in text if ord(ch) >= 32 or ch in '\n\t')
-        return sanitized[:self.max_description_length]
+        return _sanitize_cached(text, self.max_description_length)
 
-    def analyze_emotions(self, text: str) -> List[EmotionScore]:
-        text = self._sanitize_text(text)
-        if not text.strip():
-            return [EmotionScore(emotion="neutral", score=1.0)]
+    @staticmethod
+    def _decode_emotions(result: List[Dict[str, Any]]) -> List[EmotionScore]:
+        """Convert one classifier result (all labels with scores) into EmotionScores"""
+        return [EmotionScore(emotion=e['label'].lower(), score=e['score']) for e in result]
+
+    def _run_classifier(self, texts: List[str]) -> List[List[Dict[str, Any]]]:
+        """
+        Score texts with the classifier's tokenizer + model directly, skipping the pipeline's
+        per-sample pre/post-processing. Output is aligned with `texts` and matches the
+        pipeline's top_k=None format.
+
+        Texts are fed shortest-first so each batch pads to a similar length. They are tokenized
+        once, unpadded, and each batch is padded from those encodings with tokenizer.pad.
+        """
+        classifier = self.emotion_classifier
+        model = getattr(classifier, "model", None)
+        tokenizer = getattr(classifier, "tokenizer", None)
+        if torch is None or model is None or tokenizer is None:
+            # No tokenizer to measure with; character count ranks sentences closely enough
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+            outputs = classifier([texts[i] for i in order], batch_size=self.emotion_batch_size, truncation=True)
+            aligned: List[Any] = [None] * len(texts)
+            for i, output in zip(order, outputs):
+                aligned[i] = output
+            return aligned
+
+        encodings = tokenizer(texts, truncation=True, max_length=512)
+        features = [dict(zip(encodings.keys(), values)) for values in zip(*encodings.values())]
+        order = sorted(range(len(texts)), key=lambda i: len(features[i]["input_ids"]))
+
+        id2label = model.config.id2label
+        multi_label = model.config.problem_type == "multi_label_classification"
+        rows: List[Any] = [None] * len(texts)
+        with torch.inference_mode():
+            for start in range(0, len(order), self.emotion_batch_size):
+                chunk = order[start:start + self.emotion_batch_size]
+                enc = tokenizer.pad([features[i] for i in chunk], return_tensors="pt").to(model.device)
+                logits = model(**enc).logits
+                # Same activation the pipeline picks for this model
+                probs = logits.sigmoid() if multi_label else logits.softmax(dim=-1)
+                for i, row in zip(chunk, probs.tolist()):
+                    rows[i] = row
+
+        return [
+            sorted(
+                ({"label": id2label[j], "score": score} for j, score in enumerate(row)),
+                key=lambda e: e["score"], reverse=True
+            )
+            for row in rows
+        ]
+
+    def classify_emotions(self, texts: List[str]) -> List[List[EmotionScore]]:
+        """
+        Classify many texts in batches of emotion_batch_size.
+        Results are aligned with `texts`; empty texts score as neutral.
+        """
+        texts = [self._sanitize_text(text) for text in texts]
+        results: List[List[EmotionScore]] = [[EmotionScore(emotion="neutral", score=1.0)] for _ in texts]
+        pending = [i for i, text in enumerate(texts) if text.strip()]
+        if not pending:
+            return results
 
         try:
             start_time = time.time()
-            results = self.emotion_classifier(text)
-            EMOTION_CLASSIFICATIONS.inc()
+            outputs = self._run_classifier([texts[i] for i in pending])
+            EMOTION_CLASSIFICATIONS.inc(len(pending))
             ANALYSIS_DURATION.observe(time.time() - start_time)
 
-            all_scores = results[0] if results else []
-            emotions = [
-                EmotionScore(emotion=e['label'].lower(), score=e['score'])
-                for e in all_scores
-            ]
-            return emotions
+            for i, output in zip(pending, outputs):
+                results[i] = self._decode_emotions(output)
         except Exception as e:
-            logger.error(f"Emotion classification failed for text: '{text[:50]}...': {e}")
-            return [EmotionScore(emotion="error", score=0.0)]
+            logger.error(f"Emotion classification failed for {len(pending)} texts, first: '{texts[pending[0]][:50]}...': {e}")
+            for i in pending:
+                results[i] = [EmotionScore(emotion="error", score=0.0)]
+        return results
+
+    def analyze_emotions(self, text: str) -> List[EmotionScore]:
+        return self.classify_emotions([text])[0]
 
     def estimate_panic_level(self, emotions: List[EmotionScore]) -> str:
         panic_score = sum(em.score * self.panic_weights.get(em.emotion, 0.0) for em in emotions)
@@ -150,6 +377,22 @@ class AnalyserA:
         else:
             return "low"
 
+    def estimate_panic_levels(self, chunk_emotions: List[List[EmotionScore]]) -> List[str]:
+        """Vectorized estimate_panic_level over many chunks at once"""
+        n = len(chunk_emotions)
+        if n == 0:
+            return []
+        counts = np.fromiter((len(emotions) for emotions in chunk_emotions), dtype=np.intp, count=n)
+        weight = self.panic_weights.get
+        weighted = np.fromiter(
+            (em.score * weight(em.emotion, 0.0) for emotions in chunk_emotions for em in emotions),
+            dtype=np.float64, count=int(counts.sum())
+        )
+        panic_scores = np.bincount(np.repeat(np.arange(n), counts), weights=weighted, minlength=n)
+        for panic_score in panic_scores.tolist():
+            PANIC_SCORES.observe(panic_score)
+        return np.where(panic_scores >= 1.0, "high", np.where(panic_scores >= 0.5, "medium", "low")).tolist()
+
     def estimate_risk_level(self, severity: str) -> str:
         if severity == "very_high":
             return "critical"
@@ -160,44 +403,37 @@ class AnalyserA:
         else:
             return "low"
 
-    # Inside AnalyserA class, replace analyze_human_response_chunks with this:
-    def analyze_human_response_chunks(self, report: Report) -> List[HumanHotspot]:
-        """
-        Split description into chunks (sentences) and analyze each for emotions.
-        Returns list of HumanHotspot objects.
-        """
-        description = self._sanitize_text(report.description or "")
-        chunks = []
-
-        if description:
-            try:
-                # Primary: NLTK sentence tokenizer
-                chunks = sent_tokenize(description)
-            except Exception as e:
-                logger.warning(f"NLTK tokenization failed: {e}. Falling back to manual splitting.")
-                # Fallback: Split by periods, exclamation, question marks
-                import re
-                chunks = re.split(r'[.!?]+', description)
-                # Filter out empty/whitespace-only chunks
-                chunks = [chunk.strip() for chunk in chunks if chunk.strip()]
+    def _split_chunks(self, description: Optional[str]) -> List[str]:
+        """Split a description into sentence chunks; always returns at least one chunk"""
+        description = self._sanitize_text(description or "")
+        chunks = list(_sent_tokenize_cached(description)) if description else []
 
         if not chunks:
             chunks = [""]  # Ensure at least one chunk for testing
+        return chunks
 
-        human_hotspots = []
-        for chunk in chunks:
-            emotions = self.analyze_emotions(chunk)
-            panic_level = self.estimate_panic_level(emotions)
-            hotspot = HumanHotspot(
+    def _build_human_hotspots(
+        self, report: Report, chunk_emotions: List[List[EmotionScore]], panic_levels: List[str]
+    ) -> List[HumanHotspot]:
+        return [
+            HumanHotspot(
                 location=report.location,
                 timestamp=report.timestamp,
                 emotions=emotions,
                 panic_level=panic_level,
                 affected_population_estimate=None
             )
-            human_hotspots.append(hotspot)
+            for emotions, panic_level in zip(chunk_emotions, panic_levels)
+        ]
 
-        return human_hotspots
+    def analyze_human_response_chunks(self, report: Report) -> List[HumanHotspot]:
+        """
+        Split description into chunks (sentences) and analyze each for emotions.
+        Returns list of HumanHotspot objects.
+        """
+        chunks = self._split_chunks(report.description)
+        chunk_emotions = self.classify_emotions(chunks)
+        return self._build_human_hotspots(report, chunk_emotions, self.estimate_panic_levels(chunk_emotions))
 
     def analyze_disaster_hotspot(self, report: Report) -> DisasterHotspot:
         event_type = (report.event_type or "").lower() if report.event_type else ""
@@ -214,13 +450,31 @@ class AnalyserA:
             description_summary=description_summary
         )
 
-    def analyze_reports(self, reports: List[Report]) -> AnalysisOutput:
+    def _split_reports(self, reports: List[Report]):
+        """Pass 1: chunk every report into one flat list, remembering each report's slice"""
+        all_chunks: List[str] = []
+        spans = []
+        for report in reports:
+            try:
+                chunks = self._split_chunks(report.description)
+            except Exception as e:
+                logger.error(f"Failed to analyze report {report}: {e}")
+                continue  # Skip bad reports, don't crash entire batch
+            spans.append((report, len(all_chunks), len(all_chunks) + len(chunks)))
+            all_chunks.extend(chunks)
+        return all_chunks, spans
+
+    def _assemble_output(self, spans, chunk_emotions: List[List[EmotionScore]]) -> AnalysisOutput:
+        """Pass 2: scatter classified chunks back per report"""
         all_human_hotspots = []
         all_disaster_hotspots = []
+        panic_levels = self.estimate_panic_levels(chunk_emotions)
 
-        for report in reports:
+        for report, start, end in spans:
             try:
-                human_hotspots = self.analyze_human_response_chunks(report)
+                human_hotspots = self._build_human_hotspots(
+                    report, chunk_emotions[start:end], panic_levels[start:end]
+                )
                 disaster_hotspot = self.analyze_disaster_hotspot(report)
                 all_human_hotspots.extend(human_hotspots)
                 all_disaster_hotspots.append(disaster_hotspot)
@@ -233,7 +487,16 @@ class AnalyserA:
             disaster_hotspots=all_disaster_hotspots
         )
 
+    def analyze_reports(self, reports: List[Report]) -> AnalysisOutput:
+        all_chunks, spans = self._split_reports(reports)
+        # One batched classifier call for every sentence of every report
+        return self._assemble_output(spans, self.classify_emotions(all_chunks))
+
     async def analyze_reports_async(self, reports: List[Report]) -> AnalysisOutput:
-        """Async wrapper for non-blocking I/O in web servers"""
-        loop = asyncio.get_event_loop()
-        return await loop.run_in_executor(None, self.analyze_reports, reports)
\ No newline at end of file
+        """
+        Async path for web servers: chunks from concurrent callers are coalesced
+        into one classifier batch, and all CPU work runs off the event loop.
+        """
+        all_chunks, spans = await asyncio.to_thread(self._split_reports, reports)
+        chunk_emotions = await self._coalescer.submit(all_chunks)
+        return await asyncio.to_thread(self._assemble_output, spans, chunk_emotions)
@@ -1,10 +1,15 @@
 # src/checker/checker.py
 import asyncio
 import logging
-from typing import List, Optional, Dict, Any, Set
+import re
+from functools import lru_cache
+from collections import defaultdict
+import heapq
+from typing import List, Optional, Dict, Any, Set, Tuple
 from pydantic import BaseModel, Field
-from rapidfuzz import fuzz
-from datetime import datetime
+from rapidfuzz import fuzz, process
+from datetime import date
+import numpy as np
 import time
 from prometheus_client import Counter as PrometheusCounter, Histogram, Gauge
 
@@ -12,6 +17,35 @@ from prometheus_client import Counter as PrometheusCounter, Histogram, Gauge
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+TIMESTAMP_FORMAT = "%Y-%m-%dT%H:%M:%SZ"
+# Same strings TIMESTAMP_FORMAT accepts, without strptime's per-call format handling
+_TIMESTAMP_RE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})T(\d{1,2}):(\d{1,2}):(\d{1,2})Z")
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+@lru_cache(maxsize=65536)
+def _parse_timestamp(ts: str) -> Optional[int]:
+    """Epoch seconds for a TIMESTAMP_FORMAT string, or None if it doesn't parse"""
+    m = _TIMESTAMP_RE.fullmatch(ts)
+    if not m:
+        return None
+    year, month, day, hour, minute, second = map(int, m.groups())
+    if hour > 23 or minute > 59 or second > 59:
+        return None
+    try:
+        # date() rejects out-of-range days/months (month 13, Feb 30) just like strptime did
+        days = date(year, month, day).toordinal() - _EPOCH_ORDINAL
+    except ValueError:
+        return None
+    return days * 86400 + hour * 3600 + minute * 60 + second
+
+# Field-presence bits; a report can only head or join a cluster with event type and time present
+_HAS_EVENT, _HAS_LOCATION, _HAS_TIMESTAMP, _HAS_DESCRIPTION = 1, 2, 4, 8
+_CLUSTERABLE = _HAS_EVENT | _HAS_TIMESTAMP
+
+# Score cells per cdist block in _value_match (~32 MB of float64), whatever the number of distinct values
+_MATCH_BLOCK_CELLS = 1 << 22
+
 # Prometheus metrics
 CLUSTERS_CREATED = PrometheusCounter('checker_clusters_created_total', 'Total clusters created')
 REPORTS_PROCESSED = PrometheusCounter('checker_reports_processed_total', 'Total reports processed')
@@ -39,6 +73,14 @@ class Reports(BaseModel):
 # === 2. CheckerA ===
 
 class CheckerA:
+    __slots__ = (
+        "trusted_sources",
+        "event_type_similarity_threshold",
+        "location_similarity_threshold",
+        "description_similarity_threshold",
+        "time_window_seconds",
+    )
+
     def __init__(self, config: Optional[Dict[str, Any]] = None):
         config = config or {}
         self.trusted_sources: Set[str] = set(config.get("trusted_sources", [
@@ -67,56 +109,117 @@ class CheckerA:
         if not a or not b:
             return 0.0
         try:
-            return float(fuzz.token_set_ratio(str(a).lower(), str(b).lower()))
+            return float(fuzz.token_set_ratio(str(a).lower(), str(b).lower(), processor=None))
         except Exception as e:
             logger.warning(f"Similarity calculation failed: {e}")
             return 0.0
 
+    def _parse_ts(self, ts: Optional[str]) -> Optional[int]:
+        return _parse_timestamp(ts) if ts else None
+
     def time_within_window(self, t1: Optional[str], t2: Optional[str]) -> bool:
-        fmt = "%Y-%m-%dT%H:%M:%SZ"
-        try:
-            dt1 = datetime.strptime(t1, fmt)
-            dt2 = datetime.strptime(t2, fmt)
-            return abs((dt1 - dt2).total_seconds()) <= self.time_window_seconds
-        except Exception as e:
-            logger.warning(f"Timestamp parsing failed for {t1} or {t2}: {e}")
+        e1, e2 = self._parse_ts(t1), self._parse_ts(t2)
+        if e1 is None or e2 is None:
+            logger.warning(f"Timestamp parsing failed for {t1} or {t2}")
             return False
+        return abs(e1 - e2) <= self.time_window_seconds
 
-    def _create_clusters(self, reports: List[Report]) -> List[List[Report]]:
-        clusters: List[List[Report]] = []
-        start_time = time.time()
+    @staticmethod
+    def _normalize(values: List[Optional[str]]) -> List[str]:
+        """Lowercase each value once per batch; missing values become "" (scored 0.0)"""
+        return [str(v).lower() if v else "" for v in values]
 
-        for report in reports:
-            matched_cluster = None
-            for cluster in clusters:
-                rep = cluster[0]  # Compare against first report in cluster
-
-                # All fields must match thresholds
-                if report.event_type and rep.event_type:
-                    if self.similarity(report.event_type, rep.event_type) < self.event_type_similarity_threshold:
-                        continue
-                else:
-                    continue  # Skip if either event_type missing
+    def _value_match(self, values: List[Optional[str]], threshold: float) -> Tuple[List[Set[int]], np.ndarray]:
+        """
+        Returns (matches, ids): ids[j] in matches[ids[i]] iff similarity(values[i], values[j]) >= threshold.
+        Distinct values are scored with multi-threaded rapidfuzz cdist, a block of rows at a time,
+        so memory grows with the matches rather than with the square of the distinct values.
+        """
+        lowered = self._normalize(values)
+        uniques = list(dict.fromkeys(lowered))
+        index = {value: i for i, value in enumerate(uniques)}
+        ids = np.fromiter((index[v] for v in lowered), dtype=np.intp, count=len(lowered))
 
-                if self.similarity(report.location, rep.location) < self.location_similarity_threshold:
-                    continue
+        # similarity() scores a missing value as 0.0, so missing values match nothing
+        matches: List[Set[int]] = [set() for _ in uniques]
+        present = np.array([i for i, v in enumerate(uniques) if v], dtype=np.intp)
+        choices = [uniques[i] for i in present]
+        rows_per_block = max(1, _MATCH_BLOCK_CELLS // max(1, len(choices)))
+        for start in range(0, len(choices), rows_per_block):
+            scores = process.cdist(
+                choices[start:start + rows_per_block], choices, scorer=fuzz.token_set_ratio,
+                processor=None, dtype=np.float64, score_cutoff=threshold, workers=-1
+            )
+            for row_id, row in zip(present[start:start + rows_per_block].tolist(), scores >= threshold):
+                matches[row_id] = set(present[row].tolist())
+        return matches, ids
 
-                if report.timestamp and rep.timestamp:
-                    if not self.time_within_window(report.timestamp, rep.timestamp):
-                        continue
-                else:
-                    continue
+    def _epoch_seconds(self, timestamps: List[Optional[str]]) -> np.ndarray:
+        """Parse each timestamp once; missing or unparseable ones become NaN"""
+        epochs = np.full(len(timestamps), np.nan)
+        for i, ts in enumerate(timestamps):
+            epoch = self._parse_ts(ts)
+            if epoch is not None:
+                epochs[i] = epoch
+            elif ts:
+                logger.warning(f"Timestamp parsing failed for {ts}")
+        return epochs
 
-                if self.similarity(report.description, rep.description) < self.description_similarity_threshold:
-                    continue
+    def _create_clusters(self, reports: List[Report]) -> List[List[Report]]:
+        start_time = time.time()
+        event_ok, event_ids = self._value_match([r.event_type for r in reports], self.event_type_similarity_threshold)
+        location_ok, location_ids = self._value_match([r.location for r in reports], self.location_similarity_threshold)
+        epochs = self._epoch_seconds([r.timestamp for r in reports])
+        descriptions = self._normalize([r.description for r in reports])
+        window = self.time_window_seconds
 
-                matched_cluster = cluster
-                break
+        # The greedy loop below is inherently sequential, so it runs on plain Python ints/sets:
+        # per-row NumPy dispatch costs more than the handful of candidates it checks.
+        event_ids, location_ids, epochs = event_ids.tolist(), location_ids.tolist(), epochs.tolist()
+        description_threshold = self.description_similarity_threshold
+        presence = [
+            (_HAS_EVENT if r.event_type else 0) | (_HAS_LOCATION if r.location else 0)
+            | (_HAS_TIMESTAMP if epoch == epoch else 0) | (_HAS_DESCRIPTION if d else 0)  # NaN != NaN
+            for r, epoch, d in zip(reports, epochs, descriptions)
+        ]
 
-            if matched_cluster is None:
-                clusters.append([report])
+        # Each report joins the first existing cluster whose head (first report) it matches.
+        # Blocking: heads are indexed by time bucket of width `window`, so a report only looks at
+        # heads in its own and the two neighbouring buckets (anything further is out of window).
+        # Reports lacking a _CLUSTERABLE field can never match, either way.
+        heads_by_bucket: Dict[int, List[int]] = defaultdict(list)
+        members: Dict[int, List[Report]] = {}
+        for i, report in enumerate(reports):
+            matched = None
+            epoch = epochs[i]
+            fields = presence[i]
+            eligible = fields & _CLUSTERABLE == _CLUSTERABLE
+            if eligible:
+                bucket = int(epoch // window) if window > 0 else int(epoch)
+                events, locations, description = event_ok[event_ids[i]], location_ok[location_ids[i]], descriptions[i]
+                # Bucket lists are in creation order; merging them lazily stops at the first match
+                for j in heapq.merge(
+                    heads_by_bucket.get(bucket - 1, ()), heads_by_bucket.get(bucket, ()), heads_by_bucket.get(bucket + 1, ())
+                ):
+                    # All four fields must match, so test cheapest first: time, location, event, then
+                    # description; score_cutoff lets rapidfuzz bail out early on hopeless pairs.
+                    if (abs(epochs[j] - epoch) > window or location_ids[j] not in locations
+                            or event_ids[j] not in events):
+                        continue
+                    # A description missing on either side scores 0.0, like similarity()
+                    score = fuzz.token_set_ratio(
+                        description, descriptions[j], processor=None, score_cutoff=description_threshold
+                    ) if fields & presence[j] & _HAS_DESCRIPTION else 0.0
+                    if score >= description_threshold:
+                        matched = j
+                        break
+            if matched is None:
+                members[i] = [report]
+                if eligible:
+                    heads_by_bucket[bucket].append(i)
             else:
-                matched_cluster.append(report)
+                members[matched].append(report)
+        clusters: List[List[Report]] = list(members.values())
 
         PROCESSING_DURATION.observe(time.time() - start_time)
         CLUSTERS_CREATED.inc(len(clusters))
@@ -128,9 +231,10 @@ class CheckerA:
 
     def process_clusters(self, clusters: List[List[Report]]) -> List[Report]:
         verified_reports = []
+        is_source_trusted = self.is_source_trusted
 
         for cluster in clusters:
-            trusted_count = sum(self.is_source_trusted(r.source) for r in cluster)
+            trusted_count = sum(is_source_trusted(r.source) for r in cluster)
             total_count = len(cluster)
 
             REPORTS_PROCESSED.inc(total_count)
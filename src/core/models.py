@@ -1,7 +1,8 @@
 # src/core/models.py
 from sqlalchemy import (
-    Column, Integer, String, DateTime, JSON, ForeignKey, Float, Enum, Table, Index, text
+    Column, Integer, String, DateTime, JSON, ForeignKey, Float, Enum, Table, Index, UniqueConstraint, text
 )
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
 from enum import Enum as PyEnum
@@ -33,7 +34,7 @@ compositehotspot_report = Table(
 class RawPost(Base):
     __tablename__ = "raw_posts"
     id = Column(Integer, primary_key=True, index=True)
-    content = Column(JSON, nullable=False)
+    content = Column(JSONB, nullable=False)
     hash = Column(String(64), unique=True, nullable=False)
     prev_hash = Column(String(64), nullable=True)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
@@ -57,12 +58,14 @@ class Report(Base):
     __tablename__ = "reports"
     id = Column(Integer, primary_key=True, index=True)
     raw_post_id = Column(Integer, ForeignKey("raw_posts.id", ondelete="CASCADE"), nullable=False)
-    event_type = Column(String, nullable=True, index=True)
-    location = Column(String, nullable=True, index=True)
-    timestamp = Column(DateTime(timezone=True), nullable=True, index=True)
+    # Position of the report within its raw post's extraction; (raw_post_id, ordinal) is the natural key
+    ordinal = Column(Integer, nullable=False, default=0)
+    event_type = Column(String, nullable=True)
+    location = Column(String, nullable=True)
+    timestamp = Column(DateTime(timezone=True), nullable=True)
     description = Column(String, nullable=True)
     source = Column(String, nullable=True, index=True)
-    media_urls = Column(JSON, default=list)
+    media_urls = Column(ARRAY(String), default=list)
     reporter = Column(String, nullable=True)
     confidence = Column(Float, nullable=True)
     veracity_flag = Column(String, nullable=True, index=True)
@@ -94,18 +97,21 @@ class Report(Base):
         back_populates="reports"
     )
 
+    # Composites match the agent filters; their prefixes cover status, (status, veracity_flag)
+    # and location lookups, so those need no index of their own
     __table_args__ = (
-        Index('idx_reports_status_veracity', 'status', 'veracity_flag'),
-        Index('idx_reports_location', 'location'),
+        Index('idx_reports_status_verac_ts', 'status', 'veracity_flag', 'timestamp'),
+        Index('idx_reports_loc_event_ts', 'location', 'event_type', 'timestamp'),
+        UniqueConstraint('raw_post_id', 'ordinal', name='uq_reports_raw_post_ordinal'),
     )
 
 class HumanHotspot(Base):
     __tablename__ = "human_hotspots"
     id = Column(Integer, primary_key=True, index=True)
     report_id = Column(Integer, ForeignKey("reports.id", ondelete="CASCADE"), nullable=False, unique=True)
-    location = Column(String, nullable=True, index=True)
+    location = Column(String, nullable=True)
     timestamp = Column(DateTime(timezone=True), nullable=True, index=True)
-    emotions = Column(JSON, nullable=True)
+    emotions = Column(JSONB, nullable=True)
     panic_level = Column(String, nullable=True, index=True)
     confidence = Column(Float, nullable=True)
     status = Column(Enum(AggregateStatus), nullable=False, default=AggregateStatus.pending)
@@ -113,18 +119,19 @@ class HumanHotspot(Base):
     report = relationship("Report", back_populates="human_hotspot")
 
     __table_args__ = (
-        Index('idx_human_hotspots_status', 'status'),
+        Index('idx_human_hotspots_status_ts', 'status', 'timestamp'),
         Index('idx_human_hotspots_location', 'location'),
+        Index('idx_human_hotspots_emotions_gin', 'emotions', postgresql_using='gin'),
     )
 
 class DisasterHotspot(Base):
     __tablename__ = "disaster_hotspots"
     id = Column(Integer, primary_key=True, index=True)
     report_id = Column(Integer, ForeignKey("reports.id", ondelete="CASCADE"), nullable=False, unique=True)
-    location = Column(String, nullable=True, index=True)
+    location = Column(String, nullable=True)
     timestamp = Column(DateTime(timezone=True), nullable=True, index=True)
     event_type = Column(String, nullable=True, index=True)
-    severity = Column(String, nullable=False, index=True)
+    severity = Column(String, nullable=False)
     risk_level = Column(String, nullable=True, index=True)
     confidence = Column(Float, nullable=True)
     status = Column(Enum(AggregateStatus), nullable=False, default=AggregateStatus.pending)
@@ -132,7 +139,7 @@ class DisasterHotspot(Base):
     report = relationship("Report", back_populates="disaster_hotspot")
 
     __table_args__ = (
-        Index('idx_disaster_hotspots_status', 'status'),
+        Index('idx_disaster_hotspots_status_ts', 'status', 'timestamp'),
         Index('idx_disaster_hotspots_location', 'location'),
         Index('idx_disaster_hotspots_severity', 'severity'),
     )
@@ -140,7 +147,7 @@ class DisasterHotspot(Base):
 class CompositeHotspot(Base):
     __tablename__ = "composite_hotspots"
     id = Column(Integer, primary_key=True, index=True)
-    latitude = Column(Float, nullable=False, index=True)
+    latitude = Column(Float, nullable=False)
     longitude = Column(Float, nullable=False, index=True)
     aggregated_emotions = Column(JSON, nullable=True)
     average_panic_level = Column(Float, nullable=True)
@@ -148,7 +155,7 @@ class CompositeHotspot(Base):
     severity_level = Column(String, nullable=False, default="low")
     risk_level = Column(String, nullable=False, default="unknown")
     contributing_reports_count = Column(Integer, nullable=False, default=0)
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
 
     reports = relationship(
         "Report",
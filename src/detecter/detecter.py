@@ -2,17 +2,24 @@
 import asyncio
 import logging
 import math
+import os
+import sqlite3
+import threading
 import time
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import List, Optional, Dict, Any, Tuple
 from prometheus_client import Histogram, Gauge, Counter as PrometheusCounter
-from collections import defaultdict
+from collections import Counter, OrderedDict
 from datetime import datetime
-from functools import lru_cache
 import numpy as np
+import orjson
+from rapidfuzz import fuzz, process
 from sklearn.cluster import DBSCAN
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update
+from sqlalchemy import and_, insert, or_, select, update
 from sqlalchemy.orm import selectinload
 from pydantic import BaseModel
 
@@ -71,16 +78,198 @@ class CompositeHotspotOutput(BaseModel):
 
 # === 2. GeoCoder with LRU Cache and Precise Rate Limiting ===
 
+# Shared across GeoCoder instances, keyed on the normalized location string.
+# Failed lookups are not cached so transient Nominatim errors get retried.
+GEOCODE_CACHE_SIZE = 10000
+_geocode_cache: "OrderedDict[str, Optional[Tuple[float, float]]]" = OrderedDict()
+
+# L2 behind the in-memory LRU: survives restarts so workers don't re-pay the 1 req/s tax on
+# locations already resolved. Empty GEOCODE_CACHE_PATH disables it.
+GEOCODE_CACHE_PATH = os.getenv("GEOCODE_CACHE_PATH", os.path.join(".cache", "geocode_cache.sqlite"))
+_cache_db: Optional[sqlite3.Connection] = None
+_cache_db_lock = threading.Lock()
+
+def _get_cache_db() -> Optional[sqlite3.Connection]:
+    global _cache_db
+    if _cache_db is None and GEOCODE_CACHE_PATH:
+        try:
+            if os.path.dirname(GEOCODE_CACHE_PATH):
+                os.makedirs(os.path.dirname(GEOCODE_CACHE_PATH), exist_ok=True)
+            _cache_db = sqlite3.connect(GEOCODE_CACHE_PATH, check_same_thread=False)
+            _cache_db.execute("CREATE TABLE IF NOT EXISTS geo(key TEXT PRIMARY KEY, lat REAL, lon REAL, ts INTEGER)")
+            _cache_db.commit()
+        except sqlite3.Error as e:
+            logger.warning(f"Geocode disk cache unavailable at {GEOCODE_CACHE_PATH}: {e}")
+            return None
+    return _cache_db
+
+def _cache_key(location: str) -> str:
+    return " ".join(location.lower().split())
+
+def _remember(key: str, coords: Optional[Tuple[float, float]]) -> None:
+    _geocode_cache[key] = coords
+    if len(_geocode_cache) > GEOCODE_CACHE_SIZE:
+        _geocode_cache.popitem(last=False)
+
+def _memory_lookup(key: str) -> Tuple[bool, Optional[Tuple[float, float]]]:
+    if key in _geocode_cache:
+        _geocode_cache.move_to_end(key)
+        return True, _geocode_cache[key]
+    return False, None
+
+# The _disk_* helpers block on SQLite; the async path runs them via asyncio.to_thread
+def _disk_lookup(key: str) -> Tuple[bool, Optional[Tuple[float, float]]]:
+    db = _get_cache_db()
+    if db is None:
+        return False, None
+    with _cache_db_lock:
+        row = db.execute("SELECT lat, lon FROM geo WHERE key = ?", (key,)).fetchone()
+    if row is None:
+        return False, None
+    return True, None if row[0] is None else (row[0], row[1])  # NULL lat: Nominatim found nothing
+
+def _disk_store(key: str, coords: Optional[Tuple[float, float]]) -> None:
+    db = _get_cache_db()
+    if db is None:
+        return
+    lat, lon = coords if coords else (None, None)
+    with _cache_db_lock:
+        db.execute("INSERT OR REPLACE INTO geo VALUES (?, ?, ?, ?)", (key, lat, lon, int(time.time())))
+        db.commit()
+
+def _cache_lookup(key: str) -> Tuple[bool, Optional[Tuple[float, float]]]:
+    hit, coords = _memory_lookup(key)
+    if not hit:
+        hit, coords = _disk_lookup(key)
+        if hit:
+            _remember(key, coords)
+    return hit, coords
+
+def _cache_store(key: str, coords: Optional[Tuple[float, float]]) -> None:
+    _remember(key, coords)
+    _disk_store(key, coords)
+
+# Offline gazetteer (a GeoNames cities*.txt dump) consulted before Nominatim, so well-known
+# place names never queue behind the 1 req/s limit. Empty GAZETTEER_PATH or a missing file disables it.
+GAZETTEER_PATH = os.getenv("GAZETTEER_PATH", os.path.join("data", "cities15000.txt"))
+GAZETTEER_MATCH_SCORE = 90
+# A gazetteer place: (lat, lon, country code, admin1 code), codes lower-cased
+GazetteerPlace = Tuple[float, float, str, str]
+_gazetteer: Optional[Dict[str, List[GazetteerPlace]]] = None
+_gazetteer_names: List[str] = []
+_gazetteer_lock = threading.Lock()
+
+def _load_gazetteer(path: str) -> Dict[str, List[GazetteerPlace]]:
+    """name/asciiname -> places sharing that name, most populous first"""
+    ranked: Dict[str, List[Tuple[int, GazetteerPlace]]] = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            cols = line.rstrip("\n").split("\t")
+            if len(cols) < 15:
+                continue
+            try:
+                place = (float(cols[4]), float(cols[5]), cols[8].lower(), cols[10].lower())
+                pop = int(cols[14] or 0)
+            except ValueError:
+                continue
+            for name in {_cache_key(cols[1]), _cache_key(cols[2])}:
+                if name:
+                    ranked.setdefault(name, []).append((pop, place))
+    return {
+        name: [place for _, place in sorted(entries, key=lambda e: e[0], reverse=True)]
+        for name, entries in ranked.items()
+    }
+
+def _get_gazetteer() -> Dict[str, List[GazetteerPlace]]:
+    global _gazetteer, _gazetteer_names
+    if _gazetteer is None:
+        with _gazetteer_lock:
+            if _gazetteer is None:
+                places: Dict[str, List[GazetteerPlace]] = {}
+                if GAZETTEER_PATH and os.path.exists(GAZETTEER_PATH):
+                    try:
+                        places = _load_gazetteer(GAZETTEER_PATH)
+                        logger.info(f"Loaded {len(places)} gazetteer names from {GAZETTEER_PATH}")
+                    except OSError as e:
+                        logger.warning(f"Gazetteer unavailable at {GAZETTEER_PATH}: {e}")
+                _gazetteer_names = list(places)
+                _gazetteer = places
+    return _gazetteer
+
+def _pick_place(candidates: List[GazetteerPlace], qualifiers: List[str]) -> Optional[Tuple[float, float]]:
+    """Most populous candidate whose country or admin1 code matches every qualifier"""
+    for lat, lon, country, admin1 in candidates:
+        if all(q in (country, admin1) for q in qualifiers):
+            return lat, lon
+    return None
+
+def _gazetteer_lookup(key: str) -> Optional[Tuple[float, float]]:
+    """
+    Exact match on the whole location, then on its first comma part, then a fuzzy match on it.
+    Trailing parts ("Springfield, IL, US") must match the place's country or admin1 code;
+    anything else ("Springfield, Illinois") returns None so Nominatim can resolve it.
+    """
+    places = _get_gazetteer()
+    if not places:
+        return None
+    if key in places:
+        return places[key][0][:2]
+    name, *qualifiers = [part.strip() for part in key.split(",")]
+    qualifiers = [q for q in qualifiers if q]
+    if not name:
+        return None
+    candidates = places.get(name)
+    if candidates is None:
+        match = process.extractOne(
+            name, _gazetteer_names, scorer=fuzz.ratio, processor=None, score_cutoff=GAZETTEER_MATCH_SCORE
+        )
+        if not match:
+            return None
+        candidates = places[match[0]]
+    return _pick_place(candidates, qualifiers)
+
+NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
+
+def _parse_nominatim(data: List[Dict[str, Any]]) -> Optional[Tuple[float, float]]:
+    return (float(data[0]["lat"]), float(data[0]["lon"])) if data else None
+
 class GeoCoder:
-    def __init__(self, user_agent: str = "disaster-intel-agent/1.0"):
+    def __init__(self, user_agent: str = "disaster-intel-agent/1.0", session: Optional[requests.Session] = None):
         self.user_agent = user_agent
         self.last_call_time = 0.0
+        # One keep-alive session, so each lookup skips the TCP+TLS handshake
+        self.session = session or self._create_session()
+        # Async path: client is created on first use; the lock only spaces out request starts,
+        # and concurrent lookups of the same location share one in-flight request
+        self._async_client: Optional[httpx.AsyncClient] = None
+        self._rate_lock: Optional[asyncio.Lock] = None
+        self._inflight: Dict[str, "asyncio.Future[Optional[Tuple[float, float]]]"] = {}
+
+    def _create_session(self) -> requests.Session:
+        session = requests.Session()
+        session.headers.update({"User-Agent": self.user_agent})
+        retry_strategy = Retry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+        )
+        adapter = HTTPAdapter(max_retries=retry_strategy, pool_connections=4, pool_maxsize=8)
+        session.mount("https://", adapter)
+        return session
 
-    @lru_cache(maxsize=1000)
     def geocode(self, location: str) -> Optional[Tuple[float, float]]:
         if not location or not location.strip():
             return None
 
+        key = _cache_key(location)
+        hit, coords = _cache_lookup(key)
+        if hit:
+            return coords
+        coords = _gazetteer_lookup(key)
+        if coords:
+            _remember(key, coords)
+            return coords
+
         # Nominatim rate limit: 1 request per second
         now = time.time()
         if now - self.last_call_time < 1:
@@ -89,65 +278,188 @@ class GeoCoder:
 
         GEOCODING_REQUESTS.inc()
 
-        url = "https://nominatim.openstreetmap.org/search"  # FIXED: removed trailing spaces
         params = {"q": location, "format": "json", "limit": 1}
-        headers = {"User-Agent": self.user_agent}
 
         try:
-            resp = requests.get(url, params=params, headers=headers, timeout=10)
+            resp = self.session.get(NOMINATIM_URL, params=params, timeout=10)
             resp.raise_for_status()
-            data = resp.json()
-            if not data:
-                return None
-            lat = float(data[0]["lat"])
-            lon = float(data[0]["lon"])
-            return lat, lon
+            coords = _parse_nominatim(orjson.loads(resp.content))
         except Exception as e:
             logger.error(f"Geocoding error for '{location}': {e}")
             GEOCODING_ERRORS.inc()
             return None
 
+        _cache_store(key, coords)
+        return coords
+
+    async def geocode_async(self, location: str) -> Optional[Tuple[float, float]]:
+        """Non-blocking geocode: waits for the rate limit with asyncio.sleep, not time.sleep"""
+        if not location or not location.strip():
+            return None
+
+        key = _cache_key(location)
+        hit, coords = _memory_lookup(key)
+        if hit:
+            return coords
+        # Join an in-flight lookup before any thread hop, so concurrent callers for one key
+        # share a single disk read, gazetteer scan and Nominatim request
+        if key in self._inflight:
+            try:
+                return await asyncio.shield(self._inflight[key])
+            except RuntimeError as e:
+                logger.error(f"Geocoding error for '{location}': {e}")
+                return None
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            coords, fetched = await self._resolve_async(key, location)
+            future.set_result(coords)
+            if fetched and GEOCODE_CACHE_PATH:
+                await asyncio.to_thread(_disk_store, key, coords)
+            return coords
+        finally:
+            if not future.done():
+                # We were cancelled; fail the waiters instead of handing them our CancelledError
+                future.set_exception(RuntimeError(f"lookup for '{location}' abandoned: leader cancelled"))
+                future.exception()
+            del self._inflight[key]
+
+    async def _resolve_async(self, key: str, location: str) -> Tuple[Optional[Tuple[float, float]], bool]:
+        """
+        Disk cache, then gazetteer, then Nominatim; the blocking tiers run off the loop.
+        Returns (coords, fetched), where fetched marks a Nominatim answer worth persisting.
+        """
+        if GEOCODE_CACHE_PATH:
+            hit, coords = await asyncio.to_thread(_disk_lookup, key)
+            if hit:
+                _remember(key, coords)
+                return coords, False
+        if GAZETTEER_PATH:
+            # First call loads the file, and misses run a fuzzy scan; neither belongs on the loop
+            coords = await asyncio.to_thread(_gazetteer_lookup, key)
+            if coords:
+                _remember(key, coords)
+                return coords, False
+        try:
+            coords = await self._fetch_async(location)
+        except Exception as e:
+            logger.error(f"Geocoding error for '{location}': {e}")
+            GEOCODING_ERRORS.inc()
+            return None, False
+        _remember(key, coords)
+        return coords, True
+
+    async def _fetch_async(self, location: str) -> Optional[Tuple[float, float]]:
+        if self._rate_lock is None:
+            self._rate_lock = asyncio.Lock()
+        if self._async_client is None:
+            self._async_client = httpx.AsyncClient(headers={"User-Agent": self.user_agent}, timeout=10)
+
+        # Nominatim rate limit: 1 request per second, but only request starts are serialized
+        async with self._rate_lock:
+            delay = 1 - (time.time() - self.last_call_time)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            self.last_call_time = time.time()
+
+        GEOCODING_REQUESTS.inc()
+        params = {"q": location, "format": "json", "limit": 1}
+        resp = await self._async_client.get(NOMINATIM_URL, params=params)
+        resp.raise_for_status()
+        return _parse_nominatim(orjson.loads(resp.content))
+
+    async def aclose(self) -> None:
+        if self._async_client is not None:
+            await self._async_client.aclose()
+            self._async_client = None
+
+    def geocode_batch(self, locations: List[str]) -> np.ndarray:
+        """Geocode many locations at once. Returns an (n, 2) lat/lon array; unresolved rows are NaN."""
+        coords = np.full((len(locations), 2), np.nan, dtype=np.float64)
+        resolved: Dict[str, Optional[Tuple[float, float]]] = {}
+        for i, location in enumerate(locations):
+            location = location or ""
+            if location not in resolved:
+                resolved[location] = self.geocode(location)
+            hit = resolved[location]
+            if hit:
+                coords[i] = hit
+        return coords
+
 # === 3. Haversine Distance ===
 
+_DEG_TO_RAD = math.pi / 180
+
 def haversine_distance(c1: Tuple[float, float], c2: Tuple[float, float]) -> float:
-    lat1, lon1 = map(math.radians, c1)
-    lat2, lon2 = map(math.radians, c2)
-    dlat = lat2 - lat1
-    dlon = lon2 - lon1
-    a = math.sin(dlat / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin(dlon / 2) ** 2
-    c = 2 * math.asin(math.sqrt(a))
-    r = 6371  # Earth radius in km
-    return c * r
+    """Scalar distance in km; batched callers should use haversine_vec"""
+    lat1, lon1 = c1
+    lat2, lon2 = c2
+    lat1 *= _DEG_TO_RAD
+    lat2 *= _DEG_TO_RAD
+    # Plain multiplies instead of map(radians) and ** 2: same formula, fewer interpreter steps
+    sin_dlat = math.sin((lat2 - lat1) * 0.5)
+    sin_dlon = math.sin((lon2 - lon1) * (0.5 * _DEG_TO_RAD))
+    a = sin_dlat * sin_dlat + math.cos(lat1) * math.cos(lat2) * sin_dlon * sin_dlon
+    return 2 * 6371 * math.asin(math.sqrt(a))  # Earth radius in km
+
+def haversine_vec(lats: np.ndarray, lons: np.ndarray, lat0: float, lon0: float) -> np.ndarray:
+    """Distances in km from (lat0, lon0) to every (lats[i], lons[i]) in one vectorized pass"""
+    lat1, lon1 = np.radians(lats), np.radians(lons)
+    lat0r, lon0r = math.radians(lat0), math.radians(lon0)
+    a = np.sin((lat1 - lat0r) / 2) ** 2 + np.cos(lat1) * math.cos(lat0r) * np.sin((lon1 - lon0r) / 2) ** 2
+    return 2 * 6371 * np.arcsin(np.sqrt(a))
 
 # === 4. DetecterA (Async) ===
 
+# CompositeHotspot columns carried through aggregation, and those exposed in map output
+_HOTSPOT_COLUMNS = (
+    "latitude", "longitude", "aggregated_emotions", "average_panic_level",
+    "event_types", "severity_level", "risk_level", "contributing_reports_count",
+)
+_OUTPUT_FIELDS = frozenset(CompositeHotspotOutput.model_fields) & frozenset(_HOTSPOT_COLUMNS)
+
+# Integer ids for the analyser's emotion labels (j-hartmann/emotion-english-distilroberta-base,
+# plus its "error" fallback); labels outside this vocabulary get ids on the fly
+EMOTION_IDS = {
+    emotion: i for i, emotion in enumerate(
+        ("anger", "disgust", "fear", "joy", "neutral", "sadness", "surprise", "error")
+    )
+}
+
 class DetecterA:
-    def __init__(self, db_session: AsyncSession):
+    def __init__(self, db_session: AsyncSession, geocode_concurrency: int = 8):
         self.db = db_session
         self.geocoder = GeoCoder()
+        self.geocode_concurrency = geocode_concurrency
 
     async def assemble_unified_points(self, human_hotspots, disaster_hotspots) -> List[Dict]:
-        points = []
-        tasks = []
-
-        for h in human_hotspots:
-            tasks.append(self._process_hotspot("human", h))
-        for d in disaster_hotspots:
-            tasks.append(self._process_hotspot("disaster", d))
-
-        results = await asyncio.gather(*tasks, return_exceptions=True)
-        for result in results:
+        """Geocodes each distinct location once, with at most geocode_concurrency lookups in flight"""
+        hotspots = [("human", h) for h in human_hotspots] + [("disaster", d) for d in disaster_hotspots]
+        locations = list(dict.fromkeys(h.location or "" for _, h in hotspots))
+        sem = asyncio.Semaphore(self.geocode_concurrency)
+
+        async def _geocode(location: str) -> Optional[Tuple[float, float]]:
+            async with sem:
+                return await self.geocoder.geocode_async(location)
+
+        results = await asyncio.gather(*(_geocode(loc) for loc in locations), return_exceptions=True)
+        resolved: Dict[str, Optional[Tuple[float, float]]] = {}
+        for location, result in zip(locations, results):
             if isinstance(result, Exception):
                 logger.error(f"Hotspot processing failed: {result}")
                 continue
-            if result:
-                points.append(result)
+            resolved[location] = result
+
+        points = []
+        for hotspot_type, hotspot in hotspots:
+            coords = resolved.get(hotspot.location or "")
+            if coords:
+                points.append(self._make_point(hotspot_type, hotspot, coords))
         return points
 
-    async def _process_hotspot(self, hotspot_type: str, hotspot) -> Optional[Dict]:
-        coords = self.geocoder.geocode(hotspot.location or "")
-        if not coords:
-            return None
+    @staticmethod
+    def _make_point(hotspot_type: str, hotspot, coords: Tuple[float, float]) -> Dict:
         return {
             "type": hotspot_type,
             "payload": hotspot,
@@ -156,55 +468,90 @@ class DetecterA:
             "confidence": getattr(hotspot, "confidence", 1.0) or 1.0,
         }
 
-    def cluster_points(self, points: List[Dict]) -> Dict[int, List[Dict]]:
+    def cluster_points(self, points: List[Dict], coords: Optional[np.ndarray] = None) -> Dict[int, List[Dict]]:
+        """Cluster points within 5km. `coords` may be passed as a precomputed (n, 2) lat/lon array."""
         if not points:
             return {}
 
-        coords = [(p["latitude"], p["longitude"]) for p in points]
-        radians_coords = [(math.radians(lat), math.radians(lon)) for lat, lon in coords]
-        X = np.array(radians_coords)
-        clustering = DBSCAN(eps=5.0 / 6371.0, min_samples=1, metric="haversine").fit(X)
-
-        clusters = defaultdict(list)
-        for label, point in zip(clustering.labels_, points):
-            clusters[label].append(point)
-        return clusters
-
-    async def update_or_create_composite_hotspot(self, cluster_points: List[Dict]) -> Dict:
-        total_confidence = sum(p["confidence"] for p in cluster_points)
-        if total_confidence == 0:
-            total_confidence = 1.0
-
-        avg_lat = sum(p["latitude"] * p["confidence"] for p in cluster_points) / total_confidence
-        avg_lon = sum(p["longitude"] * p["confidence"] for p in cluster_points) / total_confidence
-
-        # Query existing within 5km
-        from core.models import CompositeHotspot  # Import here to avoid circular
-        approx_deg = 0.05  # ~5.5km at equator
-        stmt = select(CompositeHotspot).where(
-            CompositeHotspot.latitude.between(avg_lat - approx_deg, avg_lat + approx_deg),
-            CompositeHotspot.longitude.between(avg_lon - approx_deg, avg_lon + approx_deg),
-        )
-        result = await self.db.execute(stmt)
-        candidates = result.scalars().all()
+        if coords is None:
+            coords = np.fromiter(
+                (v for p in points for v in (p["latitude"], p["longitude"])),
+                dtype=np.float64, count=2 * len(points)
+            ).reshape(-1, 2)
+        return self.group_by_label(points, self.cluster_labels(np.asarray(coords)))
+
+    def cluster_labels(self, coords: np.ndarray) -> np.ndarray:
+        """DBSCAN cluster label per row of an (n, 2) lat/lon array"""
+        # Points are geocoded per location string, so most rows repeat a handful of coordinates.
+        # With min_samples=1 duplicates always share a cluster: build the BallTree over the
+        # distinct coordinates only and broadcast labels back.
+        unique_coords, inverse = np.unique(coords, axis=0, return_inverse=True)
+        # np.unique returns a fresh array, so convert to radians in place rather than via a temporary
+        np.deg2rad(unique_coords, out=unique_coords)
+        clustering = DBSCAN(
+            eps=5.0 / 6371.0, min_samples=1, metric="haversine", algorithm="ball_tree", n_jobs=-1
+        ).fit(unique_coords)
+        labels = clustering.labels_[inverse.reshape(-1)]
+        # Renumber by first appearance so labels match clustering the full array
+        _, first_seen = np.unique(labels, return_index=True)
+        rank = np.empty(len(first_seen), dtype=labels.dtype)
+        rank[np.argsort(first_seen)] = np.arange(len(first_seen))
+        return rank[labels]
+
+    @staticmethod
+    def group_by_label(points: List[Dict], labels: np.ndarray) -> Dict[int, List[Dict]]:
+        # Group point indices by label with one sort instead of per-point dict appends
+        order = np.argsort(labels, kind="stable")
+        unique_labels, starts = np.unique(labels[order], return_index=True)
+        return {
+            int(label): [points[i] for i in indices]
+            for label, indices in zip(unique_labels, np.split(order, starts[1:]))
+        }
 
-        existing = None
-        for ch in candidates:
-            dist = haversine_distance((ch.latitude, ch.longitude), (avg_lat, avg_lon))
-            if dist <= 5.0:
-                existing = ch
-                break
+    @staticmethod
+    def cluster_centroids(coords: np.ndarray, confidences: np.ndarray, labels: np.ndarray) -> np.ndarray:
+        """Confidence-weighted lat/lon centroid for every label at once, as an (n_clusters, 2) array"""
+        total_confidence = np.bincount(labels, weights=confidences)
+        total_confidence[total_confidence == 0] = 1.0
+        lat = np.bincount(labels, weights=coords[:, 0] * confidences) / total_confidence
+        lon = np.bincount(labels, weights=coords[:, 1] * confidences) / total_confidence
+        return np.column_stack((lat, lon))
+
+    @staticmethod
+    def _cluster_centroid(cluster_points: List[Dict]) -> Tuple[float, float]:
+        # Structure-of-arrays view of the cluster: weighted reductions become dot products
+        n = len(cluster_points)
+        conf = np.fromiter((p["confidence"] for p in cluster_points), dtype=np.float64, count=n)
+        total_confidence = conf.sum() or 1.0
+        lat = np.fromiter((p["latitude"] for p in cluster_points), dtype=np.float64, count=n)
+        lon = np.fromiter((p["longitude"] for p in cluster_points), dtype=np.float64, count=n)
+        return float(np.dot(lat, conf) / total_confidence), float(np.dot(lon, conf) / total_confidence)
+
+    @staticmethod
+    def _aggregate_cluster(
+        cluster_points: List[Dict], avg_lat: float, avg_lon: float, existing: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Composite hotspot column values for a cluster, merged into `existing` (the current
+        column values of a matched hotspot) when given. Pure: no DB access.
+        """
+        n = len(cluster_points)
+        conf = np.fromiter((p["confidence"] for p in cluster_points), dtype=np.float64, count=n)
 
         # Aggregate data
-        emotion_agg = defaultdict(float)
-        panic_scores = []
+        emotion_ids = dict(EMOTION_IDS)
+        emo_ids: List[int] = []
+        emo_vals: List[float] = []
         severity_scale = {"critical": 4, "high": 3, "medium": 2, "low": 1}
+        panic_map = {"high": 1.0, "medium": 0.6, "low": 0.3}
         risk_counts = Counter()
         event_types_set = set()
-        severity_vals = []
         report_ids = set()
+        panic_vals = np.zeros(n)  # unweighted; 0 for non-human points
+        sev_vals = np.zeros(n)
+        is_disaster = np.zeros(n, dtype=bool)
 
-        for p in cluster_points:
+        for i, p in enumerate(cluster_points):
             payload = p["payload"]
             report_id = getattr(payload, "report_id", None)
             if report_id:
@@ -212,106 +559,155 @@ class DetecterA:
 
             if p["type"] == "human":
                 emotions = getattr(payload, "emotions", []) or []
+                confidence = p["confidence"]
                 for emo in emotions:
-                    emotion_agg[emo["emotion"]] += emo["score"] * p["confidence"]
-                panic_map = {"high": 1.0, "medium": 0.6, "low": 0.3}
+                    emo_ids.append(emotion_ids.setdefault(emo["emotion"], len(emotion_ids)))
+                    emo_vals.append(emo["score"] * confidence)
                 panic_level = (getattr(payload, "panic_level", "") or "").lower()
-                panic_scores.append(p["confidence"] * panic_map.get(panic_level, 0.0))
+                panic_vals[i] = panic_map.get(panic_level, 0.0)
             elif p["type"] == "disaster":
                 event_type = getattr(payload, "event_type", None)
                 if event_type:
                     event_types_set.add(event_type)
                 severity = getattr(payload, "severity", "low")
-                sev_val = severity_scale.get(severity, 1)
-                severity_vals.append(sev_val * p["confidence"])
+                sev_vals[i] = severity_scale.get(severity, 1)
+                is_disaster[i] = True
                 risk_level = getattr(payload, "risk_level", None)
                 if risk_level:
                     risk_counts[risk_level] += 1
 
-        total_reports = (existing.contributing_reports_count if existing else 0) + len(report_ids)
+        # Scatter-add confidence-weighted emotion scores by id; only emotions that occurred are kept
+        emo_idx = np.array(emo_ids, dtype=np.intp)
+        emo_sums = np.bincount(emo_idx, weights=np.array(emo_vals, dtype=np.float64), minlength=len(emotion_ids))
+        emo_seen = np.bincount(emo_idx, minlength=len(emotion_ids))
+        emotion_agg = {
+            emotion: float(emo_sums[i]) for emotion, i in emotion_ids.items() if emo_seen[i]
+        }
+
+        panic_sum = float(np.dot(panic_vals, conf))
+        severity_vals = (sev_vals * conf)[is_disaster].tolist()
+
+        existing_count = existing["contributing_reports_count"] if existing else 0
+        total_reports = existing_count + len(report_ids)
         rev_severity = {v: k for k, v in severity_scale.items()}
 
         if existing:
-            # Update existing
-            COMPOSITE_HOTSPOTS_UPDATED.inc()
-            aggregated_emotions = existing.aggregated_emotions or {}
+            aggregated_emotions = dict(existing["aggregated_emotions"] or {})
             for emo, score in emotion_agg.items():
                 prev_score = aggregated_emotions.get(emo, 0.0)
-                new_score = (prev_score * existing.contributing_reports_count + score) / total_reports
-                aggregated_emotions[emo] = new_score
-
-            avg_panic = (
-                (existing.average_panic_level or 0) * existing.contributing_reports_count + sum(panic_scores)
-            ) / total_reports
-
-            event_types = list(set((existing.event_types or []) + list(event_types_set)))
-            severity_level_num = max([severity_scale.get(existing.severity_level, 1)] + severity_vals or [1])
-            severity_level = rev_severity.get(severity_level_num, "low")
-            risk_level = risk_counts.most_common(1)[0][0] if risk_counts else existing.risk_level
-
-            # Weighted centroid
-            new_lat = (existing.latitude * existing.contributing_reports_count + avg_lat * len(report_ids)) / total_reports
-            new_lon = (existing.longitude * existing.contributing_reports_count + avg_lon * len(report_ids)) / total_reports
-
-            # Update in DB
-            stmt = (
-                update(CompositeHotspot)
-                .where(CompositeHotspot.id == existing.id)
-                .values(
-                    latitude=new_lat,
-                    longitude=new_lon,
-                    aggregated_emotions=aggregated_emotions,
-                    average_panic_level=avg_panic,
-                    event_types=event_types,
-                    severity_level=severity_level,
-                    risk_level=risk_level,
-                    contributing_reports_count=total_reports,
-                )
-            )
-            await self.db.execute(stmt)
-            await self.db.commit()
+                aggregated_emotions[emo] = (prev_score * existing_count + score) / total_reports
 
-            # Refresh
-            await self.db.refresh(existing)
+            severity_level_num = max([severity_scale.get(existing["severity_level"], 1)] + severity_vals or [1])
             return {
-                "latitude": existing.latitude,
-                "longitude": existing.longitude,
-                "aggregated_emotions": existing.aggregated_emotions,
-                "average_panic_level": existing.average_panic_level,
-                "event_types": existing.event_types,
-                "severity_level": existing.severity_level,
-                "risk_level": existing.risk_level,
-                "contributing_reports": existing.contributing_reports_count,
+                # Weighted centroid
+                "latitude": (existing["latitude"] * existing_count + avg_lat * len(report_ids)) / total_reports,
+                "longitude": (existing["longitude"] * existing_count + avg_lon * len(report_ids)) / total_reports,
+                "aggregated_emotions": aggregated_emotions,
+                "average_panic_level": ((existing["average_panic_level"] or 0) * existing_count + panic_sum) / total_reports,
+                "event_types": list(set((existing["event_types"] or []) + list(event_types_set))),
+                "severity_level": rev_severity.get(severity_level_num, "low"),
+                "risk_level": risk_counts.most_common(1)[0][0] if risk_counts else existing["risk_level"],
+                "contributing_reports_count": total_reports,
             }
 
-        else:
-            # Create new
-            COMPOSITE_HOTSPOTS_CREATED.inc()
-            new_hotspot = CompositeHotspot(
-                latitude=avg_lat,
-                longitude=avg_lon,
-                aggregated_emotions={k: v / len(cluster_points) for k, v in emotion_agg.items()},
-                average_panic_level=sum(panic_scores) / len(cluster_points) if panic_scores else 0.0,
-                event_types=list(event_types_set),
-                severity_level=rev_severity.get(max(severity_vals) if severity_vals else 1, "low"),
-                risk_level=risk_counts.most_common(1)[0][0] if risk_counts else "unknown",
-                contributing_reports_count=len(report_ids),
-            )
+        return {
+            "latitude": avg_lat,
+            "longitude": avg_lon,
+            "aggregated_emotions": {k: v / n for k, v in emotion_agg.items()},
+            "average_panic_level": panic_sum / n,
+            "event_types": list(event_types_set),
+            "severity_level": rev_severity.get(max(severity_vals) if severity_vals else 1, "low"),
+            "risk_level": risk_counts.most_common(1)[0][0] if risk_counts else "unknown",
+            "contributing_reports_count": len(report_ids),
+        }
+
+    @staticmethod
+    def _hotspot_output(values: Dict[str, Any]) -> Dict:
+        output = {k: v for k, v in values.items() if k in _OUTPUT_FIELDS}
+        output["contributing_reports"] = values["contributing_reports_count"]
+        return output
+
+    async def update_or_create_composite_hotspot(
+        self, cluster_points: List[Dict], centroid: Optional[Tuple[float, float]] = None
+    ) -> Dict:
+        """Single-cluster persist + commit; generate_map_json_with_persistence batches via persist_clusters"""
+        output = (await self.persist_clusters([cluster_points], [centroid]))[0]
+        if output is None:
+            raise ValueError("Failed to aggregate cluster")
+        await self.db.commit()
+        return output
+
+    async def persist_clusters(
+        self, clusters: List[List[Dict]], centroids: Optional[List[Optional[Tuple[float, float]]]] = None
+    ) -> List[Dict]:
+        """
+        Merge every cluster into the nearest composite hotspot within 5km (or create one) with one
+        SELECT for all candidates and one bulk UPDATE + one bulk INSERT. Clusters are applied in
+        order against the running state, so a hotspot matched (or created) by an earlier cluster is
+        seen by later ones exactly as with a query per cluster. Does not commit.
+        Returns one output dict per cluster, or None where aggregation failed.
+        """
+        from core.models import CompositeHotspot  # Import here to avoid circular
+        if not clusters:
+            return []
+        centroids = [
+            c if c is not None else self._cluster_centroid(cp)
+            for cp, c in zip(clusters, centroids or [None] * len(clusters))
+        ]
 
-            self.db.add(new_hotspot)
-            await self.db.commit()
-            await self.db.refresh(new_hotspot)
+        # One query: union of every centroid's ~5.5km bounding box
+        approx_deg = 0.05  # ~5.5km at equator
+        stmt = select(CompositeHotspot).where(or_(*(
+            and_(
+                CompositeHotspot.latitude.between(lat - approx_deg, lat + approx_deg),
+                CompositeHotspot.longitude.between(lon - approx_deg, lon + approx_deg),
+            )
+            for lat, lon in centroids
+        )))
+        result = await self.db.execute(stmt)
+        # Running state: (id or None for new, column values); positions stay in candidate order
+        touched = set()
+        candidates: List[Tuple[Optional[int], Dict[str, Any]]] = [
+            (ch.id, {col: getattr(ch, col) for col in _HOTSPOT_COLUMNS}) for ch in result.scalars().all()
+        ]
+
+        outputs: List[Optional[Dict]] = []
+        for cluster_points, (avg_lat, avg_lon) in zip(clusters, centroids):
+            try:
+                existing = None
+                if candidates:
+                    lats = np.fromiter((v["latitude"] for _, v in candidates), dtype=np.float64, count=len(candidates))
+                    lons = np.fromiter((v["longitude"] for _, v in candidates), dtype=np.float64, count=len(candidates))
+                    # The bounding box is re-checked because candidates cover all clusters' boxes
+                    in_box = (np.abs(lats - avg_lat) <= approx_deg) & (np.abs(lons - avg_lon) <= approx_deg)
+                    within = np.flatnonzero(in_box & (haversine_vec(lats, lons, avg_lat, avg_lon) <= 5.0))
+                    if within.size:
+                        existing = int(within[0])  # first match, as the per-candidate loop did
+
+                values = self._aggregate_cluster(
+                    cluster_points, avg_lat, avg_lon, candidates[existing][1] if existing is not None else None
+                )
+            except Exception as e:
+                logger.error(f"Failed to process cluster: {e}")
+                outputs.append(None)
+                continue
 
-            return {
-                "latitude": new_hotspot.latitude,
-                "longitude": new_hotspot.longitude,
-                "aggregated_emotions": new_hotspot.aggregated_emotions,
-                "average_panic_level": new_hotspot.average_panic_level,
-                "event_types": new_hotspot.event_types,
-                "severity_level": new_hotspot.severity_level,
-                "risk_level": new_hotspot.risk_level,
-                "contributing_reports": new_hotspot.contributing_reports_count,
-            }
+            if existing is not None:
+                COMPOSITE_HOTSPOTS_UPDATED.inc()
+                candidates[existing] = (candidates[existing][0], values)
+                touched.add(existing)
+            else:
+                COMPOSITE_HOTSPOTS_CREATED.inc()
+                candidates.append((None, values))
+            outputs.append(self._hotspot_output(values))
+
+        updates = [{"id": candidates[i][0], **candidates[i][1]} for i in sorted(touched) if candidates[i][0] is not None]
+        inserts = [values for hotspot_id, values in candidates if hotspot_id is None]
+        if updates:
+            await self.db.execute(update(CompositeHotspot), updates)
+        if inserts:
+            await self.db.execute(insert(CompositeHotspot), inserts)
+        return outputs
 
     async def generate_map_json_with_persistence(self) -> List[CompositeHotspotOutput]:
         start_time = time.time()
@@ -337,28 +733,35 @@ class DetecterA:
             logger.info("No valid geocoded points found")
             return []
 
-        # Cluster
-        clusters = self.cluster_points(points)
+        # Cluster, with every centroid computed in one pass
+        n = len(points)
+        coords = np.fromiter(
+            (v for p in points for v in (p["latitude"], p["longitude"])), dtype=np.float64, count=2 * n
+        ).reshape(-1, 2)
+        confidences = np.fromiter((p["confidence"] for p in points), dtype=np.float64, count=n)
+        labels = self.cluster_labels(coords)
+        clusters = self.group_by_label(points, labels)
+        centroids = self.cluster_centroids(coords, confidences, labels)
         CLUSTERS_CREATED.inc(len(clusters))
         logger.info(f"Created {len(clusters)} clusters")
 
-        # Process clusters
-        output_list = []
-        for cluster_points in clusters.values():
-            try:
-                hotspot_data = await self.update_or_create_composite_hotspot(cluster_points)
-                output_list.append(CompositeHotspotOutput(**hotspot_data))
-            except Exception as e:
-                logger.error(f"Failed to process cluster: {e}")
-                continue
-
-        # Mark source hotspots as aggregated
-        for p in points:
-            payload = p["payload"]
-            if p["type"] == "human":
-                payload.status = AggregateStatus.aggregated
-            elif p["type"] == "disaster":
-                payload.status = AggregateStatus.aggregated
+        # Persist all clusters with one candidate query and bulk writes
+        hotspots = await self.persist_clusters(
+            list(clusters.values()), [tuple(centroids[label].tolist()) for label in clusters]
+        )
+        output_list = [CompositeHotspotOutput(**h) for h in hotspots if h is not None]
+
+        # Mark source hotspots as aggregated: one UPDATE ... WHERE id IN (...) per table instead of
+        # a unit-of-work UPDATE per dirty row
+        for model, point_type in ((HumanHotspot, "human"), (DisasterHotspot, "disaster")):
+            ids = [p["payload"].id for p in points if p["type"] == point_type]
+            if ids:
+                await self.db.execute(
+                    update(model)
+                    .where(model.id.in_(ids))
+                    .values(status=AggregateStatus.aggregated)
+                    .execution_options(synchronize_session=False)
+                )
 
         await self.db.commit()
         PROCESSING_DURATION.observe(time.time() - start_time)
@@ -0,0 +1,42 @@
+# src/orchestrator/hash_chain.py
+import hashlib
+from typing import List
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.core.database import bulk_insert_raw_posts, lock_raw_post_chain
+from src.core.models import RawPost, ProcessStatus
+
+def sha256_hash(content: str, prev_hash: str = "") -> str:
+    # Feeding the two parts separately hashes the same bytes as prev_hash + content, without
+    # building the concatenated copy of the post first
+    m = hashlib.sha256(prev_hash.encode())
+    m.update(content.encode())
+    return m.hexdigest()
+
+async def latest_post_hash(db: AsyncSession) -> str:
+    # Appends are serialized by the chain lock, so id order is chain order (timestamps are not:
+    # rows from one bulk insert share the transaction timestamp)
+    result = await db.execute(select(RawPost.hash).order_by(RawPost.id.desc()).limit(1))
+    return result.scalar_one_or_none() or ""
+
+async def append_raw_posts(db: AsyncSession, contents: List[str]) -> List[int]:
+    """
+    Chains contents onto the stored tail and writes them with one INSERT, returning their ids.
+
+    One transaction takes the chain lock, reads the tail with an indexed SELECT and inserts the
+    batch; the commit releases the lock, so no other append can read the tail in between.
+    """
+    try:
+        await lock_raw_post_chain(db)
+        prev_hash = await latest_post_hash(db)
+        rows = []
+        for content in contents:
+            h = sha256_hash(content, prev_hash)
+            rows.append(dict(content={"text": content}, hash=h, prev_hash=prev_hash, status=ProcessStatus.pending))
+            prev_hash = h
+        return await bulk_insert_raw_posts(db, rows)
+    except BaseException:
+        await db.rollback()  # release the lock now rather than when the session closes
+        raise
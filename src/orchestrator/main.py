@@ -2,8 +2,7 @@
 import asyncio
 import logging
 import time
-import json
-import hashlib
+from dataclasses import asdict
 from typing import List
 from fastapi import FastAPI, Depends, HTTPException, Response
 from fastapi.responses import JSONResponse
@@ -17,7 +16,7 @@ import uvicorn
 from slowapi import Limiter
 from slowapi.util import get_remote_address
 
-from src.core.database import get_db, create_tables
+from src.core.database import get_db, create_tables, bulk_insert_reports
 from src.core.models import (
     RawPost,
     Report,
@@ -27,10 +26,11 @@ from src.core.models import (
     AggregateStatus,
     ProcessStatus,
 )
-from src.extractor.extractor import ExtractorA
+from src.extractor.extractor import ExtractorA, close_http_client
 from src.checker.checker import CheckerA as CheckerAgent, Report as CheckerReport
 from src.analyser.analyser import AnalyserA as AnalyserAgent, Report as AnalyserReport
 from src.detecter.detecter import DetecterA
+from src.orchestrator.hash_chain import append_raw_posts
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -86,116 +86,116 @@ app.state.limiter = limiter
 @app.post("/api/ingest")
 @limiter.limit("100/minute")
 async def ingest(request: Request, contents: List[str], db: AsyncSession = Depends(get_db)):
-    prev = await db.execute(
-        select(RawPost).order_by(RawPost.timestamp.desc()).limit(1)
-    )
-    prev_post = prev.scalar_one_or_none()
-    prev_hash = prev_post.hash if prev_post else ""
-    
-    for content in contents:
-        h = sha256_hash(content, prev_hash)
-        raw = RawPost(
-            content={"text": content}, 
-            hash=h, 
-            prev_hash=prev_hash, 
-            status=ProcessStatus.pending
-        )
-        db.add(raw)
-        await db.commit()
-        await redis.xadd(STREAMS["extract"], {"raw_post_id": str(raw.id)})
-        prev_hash = h
-    
+    if not contents:
+        return {"message": "Ingested 0 posts"}
+
+    # Chain and write the batch with one INSERT under the chain lock, then one Redis pipeline
+    raw_post_ids = await append_raw_posts(db, contents)
+
+    async with redis.pipeline(transaction=False) as pipe:
+        for raw_post_id in raw_post_ids:
+            pipe.xadd(STREAMS["extract"], {"raw_post_id": str(raw_post_id)})
+        await pipe.execute()
+
     INGESTED_TOTAL.inc(len(contents))
     return {"message": f"Ingested {len(contents)} posts"}
 
-def sha256_hash(content: str, prev_hash: str = "") -> str:
-    m = hashlib.sha256()
-    m.update((prev_hash + content).encode())
-    return m.hexdigest()
-
 # === Workers ===
 
 async def extractor_worker():
     group, consumer = "extractor_group", "extractor_consumer"
-    extractor = ExtractorA()
+    # Redis doubles as the shared LLM response cache, so duplicate posts hit the LLM once
+    extractor = ExtractorA(cache=redis)
     
-    while True:
-        try:
-            # Create consumer group
+    try:
+        while True:
             try:
-                await redis.xgroup_create(STREAMS["extract"], group, id="0", mkstream=True)
-            except Exception:
-                pass  # Group exists
-
-            data = await redis.xreadgroup(
-                group, consumer, {STREAMS["extract"]: ">"}, 
-                count=BATCH_SIZE, block=5000
-            )
+                # Create consumer group
+                try:
+                    await redis.xgroup_create(STREAMS["extract"], group, id="0", mkstream=True)
+                except Exception:
+                    pass  # Group exists
+
+                data = await redis.xreadgroup(
+                    group, consumer, {STREAMS["extract"]: ">"}, 
+                    count=BATCH_SIZE, block=5000
+                )
             
-            if not data:
-                continue
+                if not data:
+                    continue
 
-            start_time = time.time()
-            batch_ids = []
-            batch_raws = []
+                start_time = time.time()
+                batch_ids = []
+                batch_raws = []
             
-            for stream, events in data:
-                for event_id, d in events:
-                    raw_post_id = int(d["raw_post_id"])
+                for stream, events in data:
+                    for event_id, d in events:
+                        raw_post_id = int(d["raw_post_id"])
+                        async with AsyncSession() as db:
+                            result = await db.execute(
+                                select(RawPost)
+                                .where(RawPost.id == raw_post_id, RawPost.status == ProcessStatus.pending)
+                                .limit(1)
+                            )
+                            raw = result.scalar_one_or_none()
+                            if raw:
+                                raw.status = ProcessStatus.processing
+                                await db.commit()
+                                batch_raws.append(raw)
+                                batch_ids.append(event_id)
+
+                if batch_raws:
+                    # LLM calls for the whole batch overlap; results stay aligned with batch_raws
+                    results = await extractor.extract_reports_batch(
+                        [raw.content["text"] for raw in batch_raws], max_concurrency=BATCH_SIZE,
+                        return_exceptions=True
+                    )
                     async with AsyncSession() as db:
-                        result = await db.execute(
-                            select(RawPost)
-                            .where(RawPost.id == raw_post_id, RawPost.status == ProcessStatus.pending)
-                            .limit(1)
-                        )
-                        raw = result.scalar_one_or_none()
-                        if raw:
-                            raw.status = ProcessStatus.processing
-                            await db.commit()
-                            batch_raws.append(raw)
-                            batch_ids.append(event_id)
-
-            if batch_raws:
-                async with AsyncSession() as db:
-                    for raw in batch_raws:
-                        try:
-                            result = await extractor.extract_reports(raw.content["text"])
-                            if result:
-                                for rep in result.reports:
-                                    orm_report = Report(
-                                        raw_post_id=raw.id,
-                                        event_type=rep.event_type,
-                                        location=rep.location,
-                                        timestamp=rep.timestamp,
-                                        description=rep.description,
-                                        source=rep.source,
-                                        confidence=rep.confidence,
-                                        veracity_flag=rep.veracity_flag,
-                                        media_urls=rep.media_urls or [],
-                                        reporter=rep.reporter,
-                                        status=ProcessStatus.pending,
-                                    )
-                                    db.add(orm_report)
-                                    await db.flush()
-                                    await db.commit()
-                                    await redis.xadd(STREAMS["check"], {"report_id": str(orm_report.id)})
-                            raw.status = ProcessStatus.processed
-                            await db.commit()
-                            EXTRACTED_TOTAL.inc()
-                        except Exception as e:
-                            logger.error(f"Extraction failed for raw_post_id {raw.id}: {e}")
-                            raw.status = ProcessStatus.error
-                            await db.commit()
-                            ERRORS_TOTAL.inc()
-
-                    for event_id in batch_ids:
-                        await redis.xack(STREAMS["extract"], group, event_id)
+                        for raw, result in zip(batch_raws, results):
+                            try:
+                                if isinstance(result, Exception):
+                                    raise result
+                                if isinstance(result, BaseException):  # a cancelled extraction
+                                    raise RuntimeError(f"Extraction aborted: {result!r}")
+                                if result:
+                                    rows = [
+                                        dict(
+                                            raw_post_id=raw.id,
+                                            ordinal=ordinal,
+                                            event_type=rep.event_type,
+                                            location=rep.location,
+                                            timestamp=rep.timestamp,
+                                            description=rep.description,
+                                            source=rep.source,
+                                            confidence=rep.confidence,
+                                            veracity_flag=rep.veracity_flag,
+                                            media_urls=rep.media_urls or [],
+                                            reporter=rep.reporter,
+                                            status=ProcessStatus.pending,
+                                        )
+                                        for ordinal, rep in enumerate(result.reports)
+                                    ]
+                                    for report_id in await bulk_insert_reports(db, rows):
+                                        await redis.xadd(STREAMS["check"], {"report_id": str(report_id)})
+                                raw.status = ProcessStatus.processed
+                                await db.commit()
+                                EXTRACTED_TOTAL.inc()
+                            except Exception as e:
+                                logger.error(f"Extraction failed for raw_post_id {raw.id}: {e}")
+                                raw.status = ProcessStatus.error
+                                await db.commit()
+                                ERRORS_TOTAL.inc()
+
+                        for event_id in batch_ids:
+                            await redis.xack(STREAMS["extract"], group, event_id)
                     
-            WORKER_LATENCY.labels(worker='extractor').observe(time.time() - start_time)
+                WORKER_LATENCY.labels(worker='extractor').observe(time.time() - start_time)
             
-        except Exception as e:
-            logger.error(f"Extractor worker failed: {e}")
-            await asyncio.sleep(5)
+            except Exception as e:
+                logger.error(f"Extractor worker failed: {e}")
+                await asyncio.sleep(5)
+    finally:
+        await extractor.aclose()
 
 async def checker_worker():
     group, consumer = "checker_group", "checker_consumer"
@@ -335,7 +335,7 @@ async def analyser_worker():
                                 report_id=rep.id,
                                 location=h.location,
                                 timestamp=h.timestamp,
-                                emotions=[em.dict() for em in h.emotions],
+                                emotions=[asdict(em) for em in h.emotions],
                                 panic_level=h.panic_level,
                                 confidence=0.8,
                                 status=AggregateStatus.pending,
@@ -448,5 +448,9 @@ async def start_workers():
     asyncio.create_task(analyser_worker())
     asyncio.create_task(detection_scheduler())
 
+@app.on_event("shutdown")
+async def close_http_pools():
+    await close_http_client()
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
@@ -3,6 +3,10 @@ import os
 import sys
 import nltk
 
+# Keep the geocoder on its in-memory cache; no on-disk state shared between test runs
+os.environ.setdefault("GEOCODE_CACHE_PATH", "")
+os.environ.setdefault("GAZETTEER_PATH", "")
+
 # Disable tokenizers parallelism
 os.environ["TOKENIZERS_PARALLELISM"] = "false"
 
@@ -47,4 +47,130 @@ def test_sanitize_text(analyser):
     dirty = "Hello\x00World\x01Test"
     clean = analyser._sanitize_text(dirty)
     assert "\x00" not in clean
-    assert "\x01" not in clean
\ No newline at end of file
+    assert "\x01" not in clean
+
+def test_analyze_reports_batches_classifier_calls(analyser):
+    calls = []
+
+    def fake_classifier(texts, **kwargs):
+        calls.append(list(texts))
+        return [[{"label": "fear", "score": 0.9}, {"label": "joy", "score": 0.1}] for _ in texts]
+
+    analyser._emotion_classifier = fake_classifier
+    reports = [
+        Report(location="Paris", description="People are scared. Others are furious."),
+        Report(location="Lyon", description=""),
+        Report(location="Nice", description="Water is rising fast."),
+    ]
+    output = analyser.analyze_reports(reports)
+    assert len(calls) == 1
+    assert len(calls[0]) == 3  # empty description is never sent to the model
+    assert [h.location for h in output.human_hotspots] == ["Paris", "Paris", "Lyon", "Nice"]
+    assert output.human_hotspots[2].emotions[0].emotion == "neutral"
+    assert output.human_hotspots[0].emotions[0].emotion == "fear"
+
+
+def test_classify_emotions_sorts_by_length(analyser):
+    calls = []
+
+    def fake_classifier(texts, **kwargs):
+        calls.append(list(texts))
+        return [[{"label": "fear", "score": len(text) / 100}] for text in texts]
+
+    analyser._emotion_classifier = fake_classifier
+    texts = ["a much longer sentence here", "short", "", "medium text"]
+    results = analyser.classify_emotions(texts)
+    assert calls == [["short", "medium text", "a much longer sentence here"]]
+    assert [r[0].score for r in results] == [0.27, 0.05, 1.0, 0.11]
+    assert results[2][0].emotion == "neutral"
+
+
+def test_estimate_panic_levels_matches_scalar(analyser):
+    from src.analyser.analyser import EmotionScore
+    chunk_emotions = [
+        [EmotionScore(emotion="fear", score=0.8), EmotionScore(emotion="anger", score=0.7)],
+        [EmotionScore(emotion="sadness", score=0.9)],
+        [EmotionScore(emotion="neutral", score=1.0)],
+        [],
+    ]
+    expected = [analyser.estimate_panic_level(emotions) for emotions in chunk_emotions]
+    assert analyser.estimate_panic_levels(chunk_emotions) == expected == ["high", "medium", "low", "low"]
+
+def test_analysis_output_serializes_dataclass_hotspots(analyser):
+    from src.analyser.analyser import EmotionScore
+    analyser._emotion_classifier = lambda texts, **kwargs: [[{"label": "fear", "score": 0.9}] for _ in texts]
+    output = analyser.analyze_reports([Report(event_type="flood", location="Nice", description="Water rising.")])
+    assert not hasattr(output.human_hotspots[0].emotions[0], "__dict__")  # slotted, unvalidated
+    dumped = output.model_dump()
+    assert dumped["human_hotspots"][0]["emotions"] == [{"emotion": "fear", "score": 0.9}]
+    assert dumped["disaster_hotspots"][0]["severity"] == "high"
+    assert EmotionScore("fear", 0.9) == output.human_hotspots[0].emotions[0]
+
+def test_interrupted_onnx_export_leaves_no_partial_dir(tmp_path, monkeypatch):
+    import os
+    import src.analyser.analyser as analyser_module
+
+    class FakeORTModel:
+        @staticmethod
+        def from_pretrained(*args, **kwargs):
+            return object()
+
+    class FakeQuantizer:
+        @classmethod
+        def from_pretrained(cls, model):
+            return cls()
+
+        def quantize(self, save_dir, quantization_config):
+            open(os.path.join(save_dir, "model_quantized.onnx"), "w").close()
+            raise KeyboardInterrupt  # killed mid-export
+
+    monkeypatch.setattr(analyser_module, "ORTModelForSequenceClassification", FakeORTModel)
+    monkeypatch.setattr(analyser_module, "ORTQuantizer", FakeQuantizer, raising=False)
+    monkeypatch.setattr(analyser_module.AnalyserA, "_quantization_config", staticmethod(lambda: None))
+    analyser = AnalyserA(config={"use_onnx": True, "onnx_cache_dir": str(tmp_path)})
+    with pytest.raises(KeyboardInterrupt):
+        analyser._load_onnx_pipeline()
+    assert os.listdir(tmp_path) == []
+    assert AnalyserA().use_onnx is False  # ONNX is opt-in
+
+
+
+def test_run_classifier_tokenizes_once_and_pads_sorted_batches(analyser):
+    torch = pytest.importorskip("torch")
+    from types import SimpleNamespace
+    calls = {"tokenize": 0, "pad": []}
+
+    class Batch(dict):
+        def to(self, device):
+            return self
+
+    class FakeTokenizer:
+        def __call__(self, texts, **kwargs):
+            assert "padding" not in kwargs
+            calls["tokenize"] += 1
+            ids = [[1] * len(text.split()) for text in texts]
+            return {"input_ids": ids, "attention_mask": [[1] * len(i) for i in ids]}
+
+        def pad(self, features, return_tensors=None):
+            width = max(len(f["input_ids"]) for f in features)
+            calls["pad"].append([len(f["input_ids"]) for f in features])
+            return Batch({
+                key: torch.tensor([f[key] + [0] * (width - len(f[key])) for f in features])
+                for key in ("input_ids", "attention_mask")
+            })
+
+    class FakeModel:
+        config = SimpleNamespace(id2label={0: "fear", 1: "joy"}, problem_type=None)
+        device = "cpu"
+
+        def __call__(self, input_ids, attention_mask):
+            words = attention_mask.sum(dim=1, keepdim=True).float()
+            return SimpleNamespace(logits=torch.cat([words, torch.zeros_like(words)], dim=1))
+
+    analyser.emotion_batch_size = 2
+    analyser._emotion_classifier = SimpleNamespace(model=FakeModel(), tokenizer=FakeTokenizer())
+    outputs = analyser._run_classifier(["three word text", "one", "two words"])
+    assert calls["tokenize"] == 1
+    assert calls["pad"] == [[1, 2], [3]]  # shortest-first batches
+    fear = [next(e["score"] for e in out if e["label"] == "fear") for out in outputs]
+    assert fear[0] > fear[2] > fear[1]  # aligned with the input order
@@ -16,4 +16,25 @@ async def test_analyze_reports_async():
     ]
     output = await analyser.analyze_reports_async(reports)
     assert len(output.human_hotspots) > 0
-    assert output.disaster_hotspots[0].severity == "high"
\ No newline at end of file
+    assert output.disaster_hotspots[0].severity == "high"
+
+@pytest.mark.asyncio
+async def test_analyze_reports_async_coalesces_concurrent_calls():
+    analyser = AnalyserA()
+    calls = []
+
+    def fake_classifier(texts, **kwargs):
+        calls.append(list(texts))
+        return [[{"label": "fear", "score": 0.9}] for _ in texts]
+
+    analyser._emotion_classifier = fake_classifier
+    batches = [
+        [Report(location="Bangkok", description="Water is rising fast. People are panicking.")],
+        [Report(location="Manila", description="Roads are closed.")],
+        [Report(location="Jakarta", description="")],
+    ]
+    outputs = await asyncio.gather(*[analyser.analyze_reports_async(b) for b in batches])
+    assert len(calls) == 1
+    assert [len(o.human_hotspots) for o in outputs] == [2, 1, 1]
+    assert outputs[1].human_hotspots[0].location == "Manila"
+    assert outputs[2].human_hotspots[0].emotions[0].emotion == "neutral"
@@ -1,6 +1,7 @@
 # tests/test_async_extractor.py
 import asyncio
 import pytest
+from unittest.mock import patch
 from src.extractor.extractor import ExtractorA, Reports
 @pytest.mark.asyncio
 async def test_extract_reports_user_input():
@@ -8,4 +9,24 @@ async def test_extract_reports_user_input():
     text = "User reports flood in Bangkok this morning"
     reports = await extractor.extract_reports(text, is_user_input=True)
     # Will fail without API keys, but should not crash
-    assert reports is None or isinstance(reports, Reports)
\ No newline at end of file
+    assert reports is None or isinstance(reports, Reports)
+
+@pytest.mark.asyncio
+async def test_extract_reports_batch_aligned():
+    extractor = ExtractorA()
+
+    async def fake_extract(text, is_user_input=False):
+        if "boom" in text:
+            raise RuntimeError("API down")
+        return Reports(reports=[])
+
+    with patch.object(extractor, "extract_reports", side_effect=fake_extract):
+        results = await extractor.extract_reports_batch(["flood", "boom", "fire"], max_concurrency=2)
+    assert len(results) == 3
+    assert results[1] is None
+    assert isinstance(results[0], Reports) and isinstance(results[2], Reports)
+
+    with patch.object(extractor, "extract_reports", side_effect=fake_extract):
+        results = await extractor.extract_reports_batch(["flood", "boom"], return_exceptions=True)
+    assert isinstance(results[0], Reports)
+    assert isinstance(results[1], RuntimeError)
@@ -101,4 +101,58 @@ def checker_relaxed():
         "event_type_similarity_threshold": 70,
         "location_similarity_threshold": 70,
         "description_similarity_threshold": 65
-    })
\ No newline at end of file
+    })
+
+def _reference_clusters(checker, reports):
+    # Pairwise greedy clustering against cluster heads, one similarity() call per field
+    clusters = []
+    for report in reports:
+        for cluster in clusters:
+            rep = cluster[0]
+            if not (report.event_type and rep.event_type):
+                continue
+            if checker.similarity(report.event_type, rep.event_type) < checker.event_type_similarity_threshold:
+                continue
+            if checker.similarity(report.location, rep.location) < checker.location_similarity_threshold:
+                continue
+            if not (report.timestamp and rep.timestamp and checker.time_within_window(report.timestamp, rep.timestamp)):
+                continue
+            if checker.similarity(report.description, rep.description) < checker.description_similarity_threshold:
+                continue
+            cluster.append(report)
+            break
+        else:
+            clusters.append([report])
+    return clusters
+
+def test_clustering_matches_pairwise_reference(checker):
+    import random
+    rng = random.Random(7)
+    events = ["fire", "Fire", "flood", "riot", None]
+    locations = ["Paris", "paris", "London", "Bangkok", None]
+    descriptions = ["Building on fire", "Water rising fast", "Protest downtown", "Flooding near river", None]
+    reports = [
+        Report(
+            event_type=rng.choice(events),
+            location=rng.choice(locations),
+            timestamp=rng.choice([None, f"2025-09-14T{rng.randint(8, 16):02d}:{rng.randint(0, 59):02d}:00Z"]),
+            description=rng.choice(descriptions),
+        )
+        for _ in range(150)
+    ]
+    got = [[id(r) for r in c] for c in checker._create_clusters(reports)]
+    expected = [[id(r) for r in c] for c in _reference_clusters(checker, reports)]
+    assert got == expected
+
+@pytest.mark.parametrize("ts", [
+    "2025-09-14T12:00:00Z", "2025-9-1T1:2:3Z", "2024-02-29T10:00:00Z", "2025-02-30T00:00:00Z",
+    "2025-13-01T00:00:00Z", "2025-01-01T24:00:00Z", "2025-01-01 00:00:00", "2025-01-01T00:00:00Zx", "",
+])
+def test_parse_timestamp_matches_strptime(ts):
+    from datetime import datetime
+    from src.checker.checker import _parse_timestamp, TIMESTAMP_FORMAT
+    try:
+        expected = int((datetime.strptime(ts, TIMESTAMP_FORMAT) - datetime(1970, 1, 1)).total_seconds())
+    except ValueError:
+        expected = None
+    assert _parse_timestamp(ts) == expected
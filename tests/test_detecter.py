@@ -1,9 +1,11 @@
 # tests/test_detecter.py
 import pytest
 import asyncio
+import numpy as np
+import orjson
 from unittest.mock import patch, MagicMock
 from sqlalchemy.ext.asyncio import AsyncSession
-from src.detecter.detecter import DetecterA, GeoCoder
+from src.detecter.detecter import DetecterA, GeoCoder, haversine_distance
 
 @pytest.fixture
 def mock_db_session():
@@ -24,17 +26,17 @@ def test_haversine_distance():
     dist = haversine_distance(nyc, la)
     assert 3900 < dist < 4000
 
-@patch('src.detecter.detecter.requests.get')
+@patch('src.detecter.detecter.requests.Session.get')
 def test_geocode_success(mock_get, detecter):
     mock_response = MagicMock()
-    mock_response.json.return_value = [{"lat": "40.7128", "lon": "-74.0060"}]
+    mock_response.content = orjson.dumps([{"lat": "40.7128", "lon": "-74.0060"}])
     mock_response.raise_for_status.return_value = None
     mock_get.return_value = mock_response
 
     coords = detecter.geocoder.geocode("New York City")
     assert coords == (40.7128, -74.0060)
 
-@patch('src.detecter.detecter.requests.get')
+@patch('src.detecter.detecter.requests.Session.get')
 def test_geocode_failure(mock_get, detecter):
     mock_get.side_effect = Exception("API down")
     coords = detecter.geocoder.geocode("Invalid Location")
@@ -48,4 +50,226 @@ async def test_cluster_points(detecter):
     ]
     clusters = detecter.cluster_points(points)
     assert len(clusters) == 1
-    assert len(clusters[0]) == 2
\ No newline at end of file
+    assert len(clusters[0]) == 2
+
+def test_geocode_batch(detecter):
+    lookups = {"Paris": (48.8566, 2.3522)}
+    with patch.object(detecter.geocoder, 'geocode', side_effect=lambda loc: lookups.get(loc)) as mock_geocode:
+        coords = detecter.geocoder.geocode_batch(["Paris", "Nowhere", "Paris"])
+    assert coords.shape == (3, 2)
+    assert tuple(coords[0]) == (48.8566, 2.3522)
+    assert np.isnan(coords[1]).all()
+    assert mock_geocode.call_count == 2  # duplicate locations resolved once
+
+def test_cluster_centroids():
+    coords = np.array([[10.0, 20.0], [12.0, 22.0], [-5.0, 30.0]])
+    confidences = np.array([1.0, 3.0, 0.5])
+    labels = np.array([0, 0, 1])
+    centroids = DetecterA.cluster_centroids(coords, confidences, labels)
+    assert np.allclose(centroids, [[11.5, 21.5], [-5.0, 30.0]])
+
+@patch('src.detecter.detecter.requests.Session.get')
+def test_geocode_cache(mock_get, detecter):
+    mock_get.side_effect = Exception("API down")
+    assert detecter.geocoder.geocode("Cache Town") is None  # failures are not cached
+
+    mock_response = MagicMock()
+    mock_response.content = orjson.dumps([{"lat": "1.5", "lon": "2.5"}])
+    mock_get.side_effect = None
+    mock_get.return_value = mock_response
+    assert detecter.geocoder.geocode("Cache Town") == (1.5, 2.5)
+    assert GeoCoder().geocode("  cache town ") == (1.5, 2.5)  # shared, normalized key
+    assert mock_get.call_count == 2
+
+def test_haversine_vec_matches_scalar():
+    from src.detecter.detecter import haversine_distance, haversine_vec
+    lats = np.array([40.7128, 34.0522, 48.8566, 40.7128])
+    lons = np.array([-74.0060, -118.2437, 2.3522, -74.0060])
+    dists = haversine_vec(lats, lons, 40.7128, -74.0060)
+    expected = [haversine_distance((lat, lon), (40.7128, -74.0060)) for lat, lon in zip(lats, lons)]
+    assert np.allclose(dists, expected)
+    assert dists[0] == 0.0
+
+@pytest.mark.asyncio
+async def test_geocode_async_dedupes_inflight_lookups(detecter):
+    from src.detecter.detecter import _geocode_cache
+    _geocode_cache.pop("async town", None)
+    calls = []
+
+    async def fake_fetch(location):
+        calls.append(location)
+        await asyncio.sleep(0.01)
+        return (3.5, 4.5)
+
+    with patch.object(detecter.geocoder, '_fetch_async', side_effect=fake_fetch):
+        results = await asyncio.gather(*(detecter.geocoder.geocode_async("Async Town") for _ in range(5)))
+    assert results == [(3.5, 4.5)] * 5
+    assert len(calls) == 1
+    assert detecter.geocoder.geocode("async town") == (3.5, 4.5)  # shared cache with the sync path
+
+@pytest.mark.asyncio
+async def test_geocode_async_shares_gazetteer_scan_and_survives_leader_cancel(detecter, monkeypatch):
+    import src.detecter.detecter as detecter_module
+    monkeypatch.setattr(detecter_module, "GAZETTEER_PATH", "cities.txt")
+    scans = []
+
+    def fake_gazetteer_lookup(key):
+        scans.append(key)
+        return None
+
+    async def slow_fetch(location):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(detecter_module, "_gazetteer_lookup", fake_gazetteer_lookup)
+    with patch.object(detecter.geocoder, '_fetch_async', side_effect=slow_fetch):
+        leader = asyncio.create_task(detecter.geocoder.geocode_async("Cancel Town"))
+        await asyncio.sleep(0)
+        waiters = [asyncio.create_task(detecter.geocoder.geocode_async("cancel town")) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        leader.cancel()
+        assert await asyncio.gather(*waiters) == [None] * 3  # failed, not cancelled
+    assert scans == ["cancel town"]
+    assert not detecter.geocoder._inflight
+
+@patch('src.detecter.detecter.requests.Session.get')
+def test_geocode_disk_cache_survives_restart(mock_get, detecter, tmp_path, monkeypatch):
+    import src.detecter.detecter as detecter_module
+    monkeypatch.setattr(detecter_module, "GEOCODE_CACHE_PATH", str(tmp_path / "geo.sqlite"))
+    monkeypatch.setattr(detecter_module, "_cache_db", None)
+    mock_response = MagicMock()
+    mock_response.content = orjson.dumps([{"lat": "7.5", "lon": "8.5"}])
+    mock_get.return_value = mock_response
+
+    assert detecter.geocoder.geocode("Disk  Town") == (7.5, 8.5)
+    detecter_module._geocode_cache.clear()  # simulate a restart: L1 gone, SQLite remains
+    assert GeoCoder().geocode("disk town") == (7.5, 8.5)
+    assert mock_get.call_count == 1
+    detecter_module._cache_db.close()
+
+@pytest.mark.asyncio
+async def test_geocode_async_disk_cache_survives_restart(detecter, tmp_path, monkeypatch):
+    import src.detecter.detecter as detecter_module
+    monkeypatch.setattr(detecter_module, "GEOCODE_CACHE_PATH", str(tmp_path / "geo.sqlite"))
+    monkeypatch.setattr(detecter_module, "_cache_db", None)
+
+    async def fake_fetch(location):
+        return (5.5, 6.5)
+
+    with patch.object(detecter.geocoder, '_fetch_async', side_effect=fake_fetch) as fetch:
+        assert await detecter.geocoder.geocode_async("Async Disk Town") == (5.5, 6.5)
+        detecter_module._geocode_cache.clear()
+        assert await detecter.geocoder.geocode_async("async disk town") == (5.5, 6.5)
+    assert fetch.call_count == 1
+    detecter_module._cache_db.close()
+
+@patch('src.detecter.detecter.requests.Session.get')
+def test_geocode_prefers_gazetteer_over_nominatim(mock_get, detecter, tmp_path, monkeypatch):
+    import src.detecter.detecter as detecter_module
+    def row(geonameid, name, lat, lon, country, admin1, population):
+        return [geonameid, name, name, "", lat, lon, "P", "PPL", country, "", admin1, "", "", "", population]
+
+    rows = [
+        row("1", "Pune", "18.52", "73.85", "IN", "16", "3000000"),
+        row("2", "Springfield", "39.80", "-89.64", "US", "IL", "116000"),
+        row("3", "Springfield", "42.10", "-72.59", "US", "MA", "155000"),
+    ]
+    path = tmp_path / "cities.txt"
+    path.write_text("".join("\t".join(r) + "\n" for r in rows), encoding="utf-8")
+    monkeypatch.setattr(detecter_module, "GAZETTEER_PATH", str(path))
+    monkeypatch.setattr(detecter_module, "_gazetteer", None)
+    mock_response = MagicMock()
+    mock_response.content = orjson.dumps([{"lat": "1.0", "lon": "2.0"}])
+    mock_get.return_value = mock_response
+
+    assert detecter.geocoder.geocode("Pune, IN") == (18.52, 73.85)
+    assert detecter.geocoder.geocode("springfield") == (42.10, -72.59)  # most populous wins
+    assert detecter.geocoder.geocode("Springfield, IL, US") == (39.80, -89.64)  # qualifier picks the row
+    assert detecter.geocoder.geocode("Springfeld") == (42.10, -72.59)  # fuzzy
+    assert asyncio.run(detecter.geocoder.geocode_async("Springfeld, IL")) == (39.80, -89.64)
+    assert mock_get.call_count == 0
+    # Qualifiers that match no row's codes are left to Nominatim rather than guessed
+    assert detecter.geocoder.geocode("Springfield, Illinois") == (1.0, 2.0)
+    assert detecter.geocoder.geocode("Nowhere Village") == (1.0, 2.0)
+    assert mock_get.call_count == 2
+
+def test_cluster_labels_matches_dbscan_with_duplicate_coords(detecter):
+    from sklearn.cluster import DBSCAN
+    rng = np.random.default_rng(7)
+    cities = np.column_stack((rng.uniform(20, 22, 40), rng.uniform(70, 72, 40)))
+    coords = cities[rng.integers(0, len(cities), 500)]
+    expected = DBSCAN(eps=5.0 / 6371.0, min_samples=1, metric="haversine").fit(np.radians(coords)).labels_
+    assert np.array_equal(detecter.cluster_labels(coords), expected)
+
+@pytest.mark.asyncio
+async def test_assemble_unified_points_geocodes_distinct_locations_with_bounded_concurrency():
+    from types import SimpleNamespace
+    detecter = DetecterA(MagicMock(spec=AsyncSession), geocode_concurrency=2)
+    calls, active, peak = [], 0, 0
+
+    async def fake_geocode(location):
+        nonlocal active, peak
+        calls.append(location)
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return None if location == "nowhere" else (1.0, 2.0)
+
+    humans = [SimpleNamespace(location=loc, confidence=0.5) for loc in ["a", "b", "a", "c", "nowhere"]]
+    disasters = [SimpleNamespace(location="b", confidence=None)]
+    with patch.object(detecter.geocoder, "geocode_async", side_effect=fake_geocode):
+        points = await detecter.assemble_unified_points(humans, disasters)
+
+    assert sorted(calls) == ["a", "b", "c", "nowhere"]
+    assert peak == 2
+    assert [p["type"] for p in points] == ["human"] * 4 + ["disaster"]
+    assert points[-1]["confidence"] == 1.0
+
+def test_aggregate_cluster_weights_emotions_by_confidence():
+    from types import SimpleNamespace
+    points = [
+        {"type": "human", "confidence": 0.5, "payload": SimpleNamespace(
+            report_id=1, panic_level="high", emotions=[{"emotion": "fear", "score": 0.8}, {"emotion": "awe", "score": 0.4}])},
+        {"type": "human", "confidence": 1.0, "payload": SimpleNamespace(
+            report_id=2, panic_level="low", emotions=[{"emotion": "fear", "score": 0.2}])},
+    ]
+    values = DetecterA._aggregate_cluster(points, 20.0, 70.0)
+    assert values["aggregated_emotions"] == pytest.approx({"fear": (0.4 + 0.2) / 2, "awe": 0.2 / 2})
+
+@pytest.mark.asyncio
+async def test_persist_clusters_batches_db_round_trips(monkeypatch):
+    import sys
+    from types import SimpleNamespace
+    from src.core import models
+    monkeypatch.setitem(sys.modules, "core.models", models)  # detecter imports models as `core.models`
+
+    existing = SimpleNamespace(
+        id=7, latitude=10.0, longitude=20.0, aggregated_emotions={"fear": 0.5}, average_panic_level=0.5,
+        event_types=["flood"], severity_level="medium", risk_level="low", contributing_reports_count=2,
+    )
+    executed = []
+
+    class Result:
+        def scalars(self):
+            return self
+
+        def all(self):
+            return [existing]
+
+    class Session:
+        async def execute(self, stmt, params=None):
+            executed.append((stmt.__visit_name__, params))
+            return Result()
+
+    def point(report_id, lat, lon):
+        payload = SimpleNamespace(report_id=report_id, emotions=[{"emotion": "fear", "score": 0.8}], panic_level="high")
+        return {"type": "human", "payload": payload, "latitude": lat, "longitude": lon, "confidence": 1.0}
+
+    clusters = [[point(1, 10.01, 20.0)], [point(2, 50.0, 50.0)], [point(3, 10.0, 20.01)], [point(4, 50.01, 50.0)]]
+    outputs = await DetecterA(Session()).persist_clusters(clusters)
+
+    # Clusters chain through the running state: 3 merges into the hotspot 1 updated, 4 into the one 2 created
+    assert [o["contributing_reports"] for o in outputs] == [3, 1, 4, 2]
+    assert [kind for kind, _ in executed] == ["select", "update", "insert"]
+    assert [row["id"] for row in executed[1][1]] == [7]
+    assert len(executed[2][1]) == 1
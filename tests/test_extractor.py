@@ -1,7 +1,9 @@
 # tests/test_extractor.py
 import pytest
 import asyncio
-from unittest.mock import patch, MagicMock
+import httpx
+import orjson
+from unittest.mock import patch, AsyncMock, MagicMock
 from src.extractor.extractor import ExtractorA, Reports, Report
 from datetime import datetime, timezone
 
@@ -17,48 +19,110 @@ async def test_sanitize_input(extractor):
     assert "{{" in clean  # ✅ CHANGED: expect escaped braces, not removed
     assert "}}" in clean
 
+def test_sanitize_input_keeps_newlines_and_tabs(extractor):
+    assert extractor.sanitize_input("a\x01b\nc\td\x1f{e}") == "ab\nc\td{{e}}"
+
 def test_normalize_relative_times(extractor):
     text = "Flood happened last night in Jakarta"
     normalized = extractor.normalize_relative_times(text, datetime(2025, 9, 15))
     assert "2025-09-14T20:00:00Z" in normalized
 
-# ✅ FIXED: Patch 'requests.Session' — not the full module path
-@pytest.fixture
-def mock_session_class():
-    with patch('requests.Session') as mock:
-        yield mock
+PERPLEXITY_BODY = orjson.dumps({
+    "choices": [{
+        "message": {
+            "content": '{"reports": [{"event_type": "flood", "location": "Jakarta", "description": "Water rising", "source": "news", "confidence": 0.9, "veracity_flag": "confirmed"}]}'
+        }
+    }]
+})
+
+def mock_client(handler):
+    return httpx.AsyncClient(transport=httpx.MockTransport(handler))
 
 @pytest.mark.asyncio
-async def test_extract_from_perplexity_success(mock_session_class, extractor):
-    # Create extractor instance
-    extractor = ExtractorA()
-    
-    # Mock the session's post method directly
-    with patch.object(extractor.session, 'post') as mock_post:
-        # Mock the response
-        mock_response = MagicMock()
-        mock_response.json.return_value = {
-            "choices": [{
-                "message": {
-                    "content": '{"reports": [{"event_type": "flood", "location": "Jakarta", "description": "Water rising", "source": "news", "confidence": 0.9, "veracity_flag": "confirmed"}]}'
-                }
-            }]
-        }
-        mock_response.raise_for_status.return_value = None
-        mock_post.return_value = mock_response
+async def test_extract_from_perplexity_success(monkeypatch):
+    monkeypatch.setattr("src.extractor.extractor.PERPLEXITY_API_KEY", "test-key")
+    extractor = ExtractorA(client=mock_client(lambda request: httpx.Response(200, content=PERPLEXITY_BODY)))
+
+    reports = await extractor.extract_from_perplexity("Flood in Jakarta")
+    assert len(reports.reports) == 1
+    assert reports.reports[0].event_type == "flood"
+    assert reports.reports[0].location == "Jakarta"
+    assert reports.reports[0].confidence == 0.9
+    await extractor.aclose()
+
+@pytest.mark.asyncio
+async def test_extract_from_perplexity_retries_transient_status(monkeypatch):
+    monkeypatch.setattr("src.extractor.extractor.PERPLEXITY_API_KEY", "test-key")
+    statuses = iter([429, 503, 200])
+    extractor = ExtractorA(
+        config={"http_backoff": 0},
+        client=mock_client(lambda request: httpx.Response(next(statuses), content=PERPLEXITY_BODY)),
+    )
 
-        reports = await extractor.extract_from_perplexity("Flood in Jakarta")
-        assert len(reports.reports) == 1
-        assert reports.reports[0].event_type == "flood"
-        assert reports.reports[0].location == "Jakarta"
-        assert reports.reports[0].confidence == 0.9
+    reports = await extractor.extract_from_perplexity("Flood in Jakarta")
+    assert reports.reports[0].location == "Jakarta"
+    assert next(statuses, None) is None
+    await extractor.aclose()
+
+@pytest.mark.asyncio
+async def test_llm_concurrency_caps_calls_across_callers(monkeypatch):
+    monkeypatch.setattr("src.extractor.extractor.PERPLEXITY_API_KEY", "test-key")
+    active = peak = 0
+
+    async def handler(request):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return httpx.Response(200, content=PERPLEXITY_BODY)
+
+    extractor = ExtractorA(config={"llm_concurrency": 2}, client=mock_client(handler))
+    results = await asyncio.gather(*(extractor.extract_from_perplexity(f"Flood {i}") for i in range(6)))
+    assert all(r.reports for r in results)
+    assert peak == 2
+    await extractor.aclose()
+
+class FakeRedis:
+    def __init__(self):
+        self.store = {}
+
+    async def get(self, key):
+        return self.store.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.store[key] = value
+
+@pytest.mark.asyncio
+async def test_perplexity_responses_are_cached_across_workers(monkeypatch):
+    monkeypatch.setattr("src.extractor.extractor.PERPLEXITY_API_KEY", "test-key")
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        return httpx.Response(200, content=PERPLEXITY_BODY)
+
+    shared = FakeRedis()
+    first = ExtractorA(client=mock_client(handler), cache=shared)
+    second = ExtractorA(client=mock_client(handler), cache=shared)
+
+    await first.extract_from_perplexity("Flood in Jakarta")
+    await first.extract_from_perplexity("Flood in Jakarta")  # in-process hit
+    reports = await second.extract_from_perplexity("Flood in Jakarta")  # shared-cache hit
+    assert reports.reports[0].location == "Jakarta"
+    assert len(calls) == 1
+    await first.extract_from_perplexity("Fire in LA")
+    assert len(calls) == 2
+    await first.aclose()
+    await second.aclose()
 
 @pytest.mark.asyncio
 @patch('src.extractor.extractor.ThreadSafeGemini.get_instance')
 async def test_extract_from_gemini_success(mock_gemini, extractor):
     mock_llm = MagicMock()
     # ✅ Return pure JSON — no Markdown
-    mock_llm.invoke.return_value.content = '{"reports": [{"event_type": "fire", "location": "LA", "description": "Wildfire", "source": "user", "confidence": 0.8, "veracity_flag": "confirmed"}]}'
+    mock_llm.ainvoke = AsyncMock()
+    mock_llm.ainvoke.return_value.content = '{"reports": [{"event_type": "fire", "location": "LA", "description": "Wildfire", "source": "user", "confidence": 0.8, "veracity_flag": "confirmed"}]}'
     mock_gemini.return_value = mock_llm
 
     reports = await extractor.extract_from_gemini("Fire in LA")
@@ -83,4 +147,102 @@ async def test_post_process_reports(extractor):
     
     assert len(processed.reports) == 1
     assert processed.reports[0].veracity_flag == "retracted"
-    assert processed.reports[0].confidence <= 0.5
\ No newline at end of file
+    assert processed.reports[0].confidence <= 0.5
+
+
+@pytest.mark.parametrize("text,event_type,location", [
+    ("Storm surge caused flooding in Chennai", "flood", "Chennai"),  # priority order, not text order
+    ("Big waves hit Puri beach", "high_waves", "Puri"),
+    ("Rip currents near Tamil Nadu coast", "abnormal_currents", "Tamil Nadu"),
+    ("Nothing to see here", "other", "Unknown"),
+])
+def test_infer_event_type_and_location(extractor, text, event_type, location):
+    assert extractor._infer_event_type(text) == event_type
+    assert extractor._infer_location(text) == location
+
+def test_classify_matches_individual_inference(extractor):
+    text = "Storm surge caused flooding in Chennai"
+    assert extractor._classify(text) == (extractor._infer_event_type(text), extractor._infer_location(text))
+
+@pytest.mark.asyncio
+async def test_extractors_share_one_http_pool_per_loop():
+    from src.extractor.extractor import close_http_client
+    first, second = ExtractorA(), ExtractorA()
+    assert first.client is second.client
+    client = first.client
+    await close_http_client()
+    assert client.is_closed
+    assert first.client is not client  # recreated on next use
+    await close_http_client()
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_beyond_burst():
+    from src.extractor.extractor import AsyncTokenBucket
+    bucket = AsyncTokenBucket(rate=20, period=1, capacity=2)
+    loop = asyncio.get_running_loop()
+    start = loop.time()
+    for _ in range(4):
+        await bucket.acquire()
+    assert loop.time() - start >= 0.09  # two tokens of burst, then 1/20 s per token
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_prompts_share_one_call(monkeypatch):
+    monkeypatch.setattr("src.extractor.extractor.PERPLEXITY_API_KEY", "test-key")
+    calls = []
+
+    async def handler(request):
+        calls.append(request)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, content=PERPLEXITY_BODY)
+
+    extractor = ExtractorA(client=mock_client(handler))
+    results = await asyncio.gather(*(extractor.extract_from_perplexity("Flood in Jakarta") for _ in range(5)))
+    assert all(r.reports[0].location == "Jakarta" for r in results)
+    assert len(calls) == 1
+    await extractor.aclose()
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_fails_waiters_without_cancelling_them():
+    extractor = ExtractorA()
+    started = asyncio.Event()
+
+    async def slow_call():
+        started.set()
+        await asyncio.sleep(10)
+        return "{}"
+
+    leader = asyncio.create_task(extractor._cached_llm("perplexity", "same prompt", slow_call))
+    await started.wait()
+    waiter = asyncio.create_task(extractor._cached_llm("perplexity", "same prompt", slow_call))
+    await asyncio.sleep(0)
+    leader.cancel()
+    with pytest.raises(RuntimeError, match="leader cancelled"):
+        await waiter
+    assert not waiter.cancelled()
+    assert not extractor._inflight
+
+@pytest.mark.parametrize("raw,expected", [
+    ('```json\n{"reports": []}\n```', '{"reports": []}'),
+    ('  ```JSON\n{"reports": []}\n```\nHope this helps', '{"reports": []}'),
+    ('```\n{"reports": []}```', '{"reports": []}'),
+    ('{"reports": []}\x00', '{"reports": []}'),
+    ('```json {"unterminated": 1}', '```json {"unterminated": 1}'),
+])
+def test_clean_llm_json_output(extractor, raw, expected):
+    assert extractor._clean_llm_json_output(raw) == expected
+
+@pytest.mark.asyncio
+async def test_perplexity_request_keeps_instructions_in_a_fixed_system_message(monkeypatch):
+    monkeypatch.setattr("src.extractor.extractor.PERPLEXITY_API_KEY", "test-key")
+    sent = []
+
+    def handler(request):
+        sent.append(orjson.loads(request.content)["messages"])
+        return httpx.Response(200, content=PERPLEXITY_BODY)
+
+    extractor = ExtractorA(client=mock_client(handler))
+    await extractor.extract_from_perplexity("Flood in Jakarta")
+    await extractor.extract_from_perplexity("Fire in LA")
+    assert sent[0][0] == sent[1][0] and sent[0][0]["role"] == "system"
+    assert sent[1][1] == {"role": "user", "content": "Text: Fire in LA"}
+    await extractor.aclose()
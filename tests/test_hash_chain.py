@@ -0,0 +1,76 @@
+# tests/test_hash_chain.py
+import asyncio
+import pytest
+import src.orchestrator.hash_chain as hash_chain
+from src.orchestrator.hash_chain import append_raw_posts, sha256_hash
+
+class FakeChain:
+    """raw_posts table plus an asyncio.Lock standing in for the transaction-scoped advisory lock"""
+
+    def __init__(self, monkeypatch):
+        self.rows = []
+        self.fail_next_insert = False
+        self.lock = asyncio.Lock()
+        monkeypatch.setattr(hash_chain, "lock_raw_post_chain", self.lock_chain)
+        monkeypatch.setattr(hash_chain, "latest_post_hash", self.latest_hash)
+        monkeypatch.setattr(hash_chain, "bulk_insert_raw_posts", self.bulk_insert)
+
+    def session(self):
+        chain = self
+
+        class Session:
+            holds_lock = False
+
+            async def rollback(self):
+                if self.holds_lock:
+                    self.holds_lock = False
+                    chain.lock.release()
+
+        return Session()
+
+    async def lock_chain(self, db):
+        await self.lock.acquire()
+        db.holds_lock = True
+
+    async def latest_hash(self, db):
+        assert db.holds_lock
+        await asyncio.sleep(0)
+        return self.rows[-1]["hash"] if self.rows else ""
+
+    async def bulk_insert(self, db, rows):
+        await asyncio.sleep(0.001)  # let concurrent appends interleave
+        if self.fail_next_insert:
+            self.fail_next_insert = False
+            raise RuntimeError("insert failed")
+        start = len(self.rows) + 1
+        self.rows.extend(rows)
+        db.holds_lock = False  # commit ends the transaction and its lock
+        self.lock.release()
+        return list(range(start, start + len(rows)))
+
+    def assert_unbroken(self):
+        prev = ""
+        for row in self.rows:  # id order
+            assert row["prev_hash"] == prev
+            assert row["hash"] == sha256_hash(row["content"]["text"], prev)
+            prev = row["hash"]
+
+@pytest.mark.asyncio
+async def test_concurrent_appends_form_one_chain(monkeypatch):
+    chain = FakeChain(monkeypatch)
+    batches = [[f"post {i}-{j}" for j in range(3)] for i in range(8)]
+    ids = await asyncio.gather(*(append_raw_posts(chain.session(), b) for b in batches))
+    assert sorted(i for batch in ids for i in batch) == list(range(1, 25))
+    chain.assert_unbroken()
+
+@pytest.mark.asyncio
+async def test_failed_insert_releases_lock_and_keeps_chain(monkeypatch):
+    chain = FakeChain(monkeypatch)
+    await append_raw_posts(chain.session(), ["first"])
+    chain.fail_next_insert = True
+    with pytest.raises(RuntimeError):
+        await append_raw_posts(chain.session(), ["lost"])
+    assert not chain.lock.locked()
+    await append_raw_posts(chain.session(), ["second"])
+    assert [r["content"]["text"] for r in chain.rows] == ["first", "second"]
+    chain.assert_unbroken()